@@ -310,23 +310,10 @@ async def mrt_node(state: PipelineState):
             best = res[0]
             raw_dist = best.get("dist_m")
             
-            # Determine unit and format
+            # geospatial-query reports dist_m in metres (SVY21)
             if raw_dist is not None:
-                # Check if it's likely degrees (small values < 0.1)
-                if raw_dist < 0.1:
-                    # Assume degrees, convert to meters
-                    meters = raw_dist * 111000  # 1 degree ≈ 111km
-                    formatted = format_meters(meters)
-                    unit = "degrees"
-                elif raw_dist < 1000:
-                    # Assume kilometers (0.1 to 1000)
-                    meters = raw_dist * 1000
-                    formatted = format_meters(meters)
-                    unit = "km"
-                else:
-                    # Assume meters
-                    formatted = format_meters(raw_dist)
-                    unit = "m"
+                formatted = format_meters(raw_dist)
+                unit = "m"
             else:
                 formatted = "N/A"
                 unit = None
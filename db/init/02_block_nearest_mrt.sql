@@ -0,0 +1,78 @@
+-- Precomputed nearest MRT per HDB block
+--
+-- The answer only changes when hdb_property_info or mrt_exits are reloaded,
+-- so it is computed once here and joined into list-hdb-flats.
+-- Call public.refresh_hdb_block_nearest_mrt() after every data load.
+
+
+-- public.hdb_block_nearest_mrt definition
+
+CREATE TABLE IF NOT EXISTS public.hdb_block_nearest_mrt (
+	block text NOT NULL,
+	street text NOT NULL,
+	station_name text NULL,
+	exit_code text NULL,
+	distance_m float8 NULL,
+	top_stations jsonb NULL,   -- [{"station": ..., "distance_m": ...}] nearest distinct stations
+	updated_at timestamptz DEFAULT now() NULL,
+	PRIMARY KEY (block, street)
+);
+
+
+-- public.refresh_hdb_block_nearest_mrt definition
+
+CREATE OR REPLACE FUNCTION public.refresh_hdb_block_nearest_mrt(top_k int DEFAULT 3)
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+	n bigint;
+BEGIN
+	TRUNCATE public.hdb_block_nearest_mrt;
+
+	INSERT INTO public.hdb_block_nearest_mrt
+		(block, street, station_name, exit_code, distance_m, top_stations)
+	SELECT
+		b.blk_no, b.street,
+		nearest.station_name, nearest.exit_code, nearest.distance_m,
+		top.stations
+	FROM (
+		-- Same block → coordinate choice as list-hdb-flats
+		SELECT DISTINCT ON (blk_no, street) blk_no, street, geom_3414
+		FROM public.hdb_property_info
+		WHERE blk_no IS NOT NULL AND street IS NOT NULL AND geom_3414 IS NOT NULL
+		ORDER BY blk_no, street, lat, lon
+	) b
+	CROSS JOIN LATERAL (
+		SELECT e.station_name, e.exit_code, ST_Distance(e.geom_3414, b.geom_3414) AS distance_m
+		FROM public.mrt_exits e
+		ORDER BY e.geom_3414 <-> b.geom_3414
+		LIMIT 1
+	) nearest
+	CROSS JOIN LATERAL (
+		SELECT jsonb_agg(
+			jsonb_build_object('station', s.station_name, 'distance_m', round(s.d::numeric, 1))
+			ORDER BY s.d
+		) AS stations
+		FROM (
+			-- Stations have several exits; collapse the nearest exits to distinct stations
+			SELECT nn.station_name, MIN(nn.d) AS d
+			FROM (
+				SELECT e.station_name, ST_Distance(e.geom_3414, b.geom_3414) AS d
+				FROM public.mrt_exits e
+				ORDER BY e.geom_3414 <-> b.geom_3414
+				LIMIT 50
+			) nn
+			GROUP BY nn.station_name
+			ORDER BY d
+			LIMIT top_k
+		) s
+	) top;
+
+	GET DIAGNOSTICS n = ROW_COUNT;
+	RETURN n;
+END;
+$$;
+
+
+SELECT format('Precomputed nearest MRT for %s blocks', public.refresh_hdb_block_nearest_mrt());
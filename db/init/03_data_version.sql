@@ -0,0 +1,31 @@
+-- Data version marker
+--
+-- Bumped after every data load. Application caches of query results key on
+-- this value, so a reload invalidates them without restarting the backend.
+
+
+-- public.data_version definition
+
+CREATE TABLE IF NOT EXISTS public.data_version (
+	id int4 DEFAULT 1 NOT NULL PRIMARY KEY CHECK (id = 1),
+	version int8 DEFAULT 1 NOT NULL,
+	loaded_at timestamptz DEFAULT now() NOT NULL
+);
+
+
+-- public.bump_data_version definition
+
+CREATE OR REPLACE FUNCTION public.bump_data_version()
+RETURNS bigint
+LANGUAGE sql
+AS $$
+	INSERT INTO public.data_version (id, version, loaded_at)
+	VALUES (1, 1, now())
+	ON CONFLICT (id) DO UPDATE
+		SET version = public.data_version.version + 1,
+		    loaded_at = now()
+	RETURNING version;
+$$;
+
+
+SELECT format('Data version %s', public.bump_data_version());
@@ -0,0 +1,88 @@
+-- Pre-aggregated resale price statistics
+--
+-- Exact percentiles per town x flat type, so summaries cite real market
+-- numbers from one indexed lookup instead of inferring them from a 30-row
+-- sample. Call public.refresh_hdb_resale_stats() after every data load.
+
+
+-- public.hdb_resale_stats_monthly definition (town x flat type x month)
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS public.hdb_resale_stats_monthly AS
+SELECT
+	town,
+	MIN(flat_type) AS flat_type,
+	LOWER(REPLACE(flat_type, ' ', '')) AS flat_type_key,
+	month,
+	COUNT(*) AS txn_count,
+	MIN(resale_price)::float8 AS min_price,
+	percentile_cont(0.25) WITHIN GROUP (ORDER BY resale_price::float8) AS p25_price,
+	percentile_cont(0.5) WITHIN GROUP (ORDER BY resale_price::float8) AS median_price,
+	percentile_cont(0.75) WITHIN GROUP (ORDER BY resale_price::float8) AS p75_price,
+	MAX(resale_price)::float8 AS max_price,
+	percentile_cont(0.5) WITHIN GROUP (ORDER BY resale_price::float8 / NULLIF(floor_area_sqm, 0)) AS median_price_psm,
+	AVG(resale_price::float8 / NULLIF(floor_area_sqm, 0)) AS avg_price_psm
+FROM public.hdb_combined_resale_flat_prices
+WHERE resale_price IS NOT NULL AND town IS NOT NULL AND flat_type IS NOT NULL
+GROUP BY town, LOWER(REPLACE(flat_type, ' ', '')), month;
+
+CREATE UNIQUE INDEX IF NOT EXISTS hdb_resale_stats_monthly_key
+	ON public.hdb_resale_stats_monthly (town, flat_type_key, month);
+
+
+-- public.hdb_resale_stats_recent definition (trailing 12 months of data)
+--
+-- Percentiles can't be rolled up from monthly percentiles, so this is
+-- aggregated from the raw transactions as well.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS public.hdb_resale_stats_recent AS
+WITH bounds AS (
+	SELECT
+		to_char(to_date(MAX(month), 'YYYY-MM') - interval '11 months', 'YYYY-MM') AS from_month,
+		MAX(month) AS to_month
+	FROM public.hdb_combined_resale_flat_prices
+)
+SELECT
+	t.town,
+	MIN(t.flat_type) AS flat_type,
+	LOWER(REPLACE(t.flat_type, ' ', '')) AS flat_type_key,
+	b.from_month,
+	b.to_month,
+	COUNT(*) AS txn_count,
+	MIN(t.resale_price)::float8 AS min_price,
+	percentile_cont(0.25) WITHIN GROUP (ORDER BY t.resale_price::float8) AS p25_price,
+	percentile_cont(0.5) WITHIN GROUP (ORDER BY t.resale_price::float8) AS median_price,
+	percentile_cont(0.75) WITHIN GROUP (ORDER BY t.resale_price::float8) AS p75_price,
+	MAX(t.resale_price)::float8 AS max_price,
+	percentile_cont(0.5) WITHIN GROUP (ORDER BY t.resale_price::float8 / NULLIF(t.floor_area_sqm, 0)) AS median_price_psm,
+	AVG(t.resale_price::float8 / NULLIF(t.floor_area_sqm, 0)) AS avg_price_psm
+FROM public.hdb_combined_resale_flat_prices t
+CROSS JOIN bounds b
+WHERE t.month >= b.from_month
+	AND t.resale_price IS NOT NULL AND t.town IS NOT NULL AND t.flat_type IS NOT NULL
+GROUP BY t.town, LOWER(REPLACE(t.flat_type, ' ', '')), b.from_month, b.to_month;
+
+CREATE UNIQUE INDEX IF NOT EXISTS hdb_resale_stats_recent_key
+	ON public.hdb_resale_stats_recent (town, flat_type_key);
+
+
+-- public.refresh_hdb_resale_stats definition
+
+CREATE OR REPLACE FUNCTION public.refresh_hdb_resale_stats()
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+	n bigint;
+BEGIN
+	-- CONCURRENTLY keeps the views readable while they rebuild (needs the unique indexes)
+	REFRESH MATERIALIZED VIEW CONCURRENTLY public.hdb_resale_stats_monthly;
+	REFRESH MATERIALIZED VIEW CONCURRENTLY public.hdb_resale_stats_recent;
+
+	SELECT COUNT(*) INTO n FROM public.hdb_resale_stats_recent;
+	RETURN n;
+END;
+$$;
+
+
+SELECT format('Resale stats for %s town/flat type pairs', COUNT(*))
+FROM public.hdb_resale_stats_recent;
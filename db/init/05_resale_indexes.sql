@@ -0,0 +1,77 @@
+-- Index-friendly resale schema
+--
+-- list-hdb-flats used to filter on town ILIKE '%..%' and
+-- LOWER(REPLACE(flat_type, ...)), sort on the text month, and rebuild a
+-- ROW_NUMBER() window over hdb_property_info per call, so every query was a
+-- full scan. This adds normalized keys, a real date, composite indexes and a
+-- precomputed block → coordinate table. Safe to re-run on an existing database.
+-- Call public.refresh_hdb_block_coords() after reloading hdb_property_info.
+
+
+-- Normalized keys on public.hdb_combined_resale_flat_prices
+
+ALTER TABLE public.hdb_combined_resale_flat_prices
+	ADD COLUMN IF NOT EXISTS town_key text
+		GENERATED ALWAYS AS (UPPER(BTRIM(town))) STORED,
+	ADD COLUMN IF NOT EXISTS flat_type_key text
+		GENERATED ALWAYS AS (LOWER(REPLACE(flat_type, ' ', ''))) STORED,
+	-- 'YYYY-MM' → first day of month (make_date is immutable, to_date is not)
+	ADD COLUMN IF NOT EXISTS month_date date
+		GENERATED ALWAYS AS (make_date(split_part(month, '-', 1)::int, split_part(month, '-', 2)::int, 1)) STORED;
+
+-- town + flat type + newest first: serves list-hdb-flats' filter and ORDER BY/LIMIT
+CREATE INDEX IF NOT EXISTS hdb_resale_town_type_month_idx
+	ON public.hdb_combined_resale_flat_prices USING btree (town_key, flat_type_key, month_date DESC);
+
+-- town without a flat type
+CREATE INDEX IF NOT EXISTS hdb_resale_town_month_idx
+	ON public.hdb_combined_resale_flat_prices USING btree (town_key, month_date DESC);
+
+-- joins to block-level tables
+CREATE INDEX IF NOT EXISTS hdb_resale_block_street_idx
+	ON public.hdb_combined_resale_flat_prices USING btree (block, street_name);
+
+
+-- public.hdb_block_coords definition (one coordinate per block)
+
+CREATE TABLE IF NOT EXISTS public.hdb_block_coords (
+	block text NOT NULL,
+	street text NOT NULL,
+	lat float8 NULL,
+	lon float8 NULL,
+	geom_4326 public.geometry(point, 4326) NULL,
+	geom_3414 public.geometry(point, 3414) NULL,
+	PRIMARY KEY (block, street)
+);
+CREATE INDEX IF NOT EXISTS hdb_block_coords_geom_3414_idx ON public.hdb_block_coords USING gist (geom_3414);
+
+
+-- public.refresh_hdb_block_coords definition
+
+CREATE OR REPLACE FUNCTION public.refresh_hdb_block_coords()
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+	n bigint;
+BEGIN
+	TRUNCATE public.hdb_block_coords;
+
+	-- Same choice the old ROW_NUMBER() OVER (PARTITION BY blk_no, street ORDER BY lat, lon) made
+	INSERT INTO public.hdb_block_coords (block, street, lat, lon, geom_4326, geom_3414)
+	SELECT DISTINCT ON (blk_no, street)
+		blk_no, street, lat, lon, geom_4326, geom_3414
+	FROM public.hdb_property_info
+	WHERE blk_no IS NOT NULL AND street IS NOT NULL
+	ORDER BY blk_no, street, lat, lon;
+
+	GET DIAGNOSTICS n = ROW_COUNT;
+	RETURN n;
+END;
+$$;
+
+
+SELECT format('Precomputed coordinates for %s blocks', public.refresh_hdb_block_coords());
+
+ANALYZE public.hdb_combined_resale_flat_prices;
+ANALYZE public.hdb_block_coords;
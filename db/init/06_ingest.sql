@@ -0,0 +1,57 @@
+-- Bookkeeping for the Python bulk loader (autonomous_hdb_deepagents.ingest.load)
+--
+-- 01_load_data.sql still bootstraps a fresh container. Later reloads and
+-- monthly appends go through the loader, which records each file's sha256
+-- here and tags resale rows with their source file so a re-load replaces
+-- exactly that file's rows.
+
+
+-- Loader columns on public.hdb_combined_resale_flat_prices
+
+ALTER TABLE public.hdb_combined_resale_flat_prices
+	ADD COLUMN IF NOT EXISTS remaining_lease_months int4 NULL,
+	ADD COLUMN IF NOT EXISTS source_file text NULL;
+
+CREATE INDEX IF NOT EXISTS hdb_resale_source_file_idx
+	ON public.hdb_combined_resale_flat_prices USING btree (source_file);
+
+
+-- Attribute rows loaded by 01_load_data.sql to their files (by month range)
+
+UPDATE public.hdb_combined_resale_flat_prices
+SET source_file = CASE
+		WHEN month < '2000-01' THEN 'resale_flat_price_1990_1999.csv'
+		WHEN month < '2012-03' THEN 'resale_flat_price_2000_2012.csv'
+		WHEN month < '2015-01' THEN 'resale_flat_price_2012_2014.csv'
+		WHEN month < '2017-01' THEN 'resale_flat_price_2015_2016.csv'
+		ELSE 'resale_flat_price_2017.csv'
+	END
+WHERE source_file IS NULL;
+
+-- Same normalization as ingest/normalize.py: "61 years 04 months", a bare
+-- year count, or derived from the 99-year lease when the file has no column
+UPDATE public.hdb_combined_resale_flat_prices
+SET remaining_lease_months = CASE
+		WHEN remaining_lease ~ '^\s*\d+\s*$' THEN btrim(remaining_lease)::int * 12
+		WHEN remaining_lease ~* '\d+\s*years?' THEN
+			substring(remaining_lease from '(\d+)\s*[yY]')::int * 12
+			+ COALESCE(substring(remaining_lease from '(\d+)\s*[mM]')::int, 0)
+		WHEN lease_commence_date IS NOT NULL THEN
+			(lease_commence_date + 99 - split_part(month, '-', 1)::int) * 12
+			- (split_part(month, '-', 2)::int - 1)
+	END
+WHERE remaining_lease_months IS NULL;
+
+
+-- public.ingest_log definition
+
+CREATE TABLE IF NOT EXISTS public.ingest_log (
+	file_name text NOT NULL PRIMARY KEY,
+	table_name text NOT NULL,
+	sha256 text NOT NULL,
+	row_count int8 NULL,
+	loaded_at timestamptz DEFAULT now() NOT NULL
+);
+
+
+ANALYZE public.hdb_combined_resale_flat_prices;
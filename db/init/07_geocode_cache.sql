@@ -0,0 +1,75 @@
+-- OneMap geocode cache
+--
+-- Filled by autonomous_hdb_deepagents.ingest.geocode (previously the
+-- onemap-geocoding-cache notebook). Keyed on the search text (postal code),
+-- so reruns only geocode what is missing.
+
+
+-- public.canonicalize_road_name definition
+
+CREATE OR REPLACE FUNCTION public.canonicalize_road_name(full_name text)
+RETURNS text
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+	tokens text[];
+	t text;
+	out text := '';
+BEGIN
+	IF full_name IS NULL THEN
+		RETURN NULL;
+	END IF;
+
+	full_name := upper(regexp_replace(full_name, '\s+', ' ', 'g'));
+	tokens := string_to_array(full_name, ' ');
+
+	FOREACH t IN ARRAY tokens LOOP
+		CASE t
+			WHEN 'AVENUE'    THEN out := out || 'AVE ';
+			WHEN 'STREET'    THEN out := out || 'ST ';
+			WHEN 'ROAD'      THEN out := out || 'RD ';
+			WHEN 'DRIVE'     THEN out := out || 'DR ';
+			WHEN 'CRESCENT'  THEN out := out || 'CRES ';
+			WHEN 'GARDENS'   THEN out := out || 'GDNS ';
+			WHEN 'GARDEN'    THEN out := out || 'GDN ';
+			WHEN 'TERRACE'   THEN out := out || 'TER ';
+			WHEN 'HEIGHTS'   THEN out := out || 'HTS ';
+			WHEN 'PLACE'     THEN out := out || 'PL ';
+			WHEN 'BOULEVARD' THEN out := out || 'BLVD ';
+			WHEN 'PARK'      THEN out := out || 'PK ';
+			WHEN 'CIRCLE'    THEN out := out || 'CIR ';
+			WHEN 'SQUARE'    THEN out := out || 'SQ ';
+			ELSE out := out || t || ' ';
+		END CASE;
+	END LOOP;
+
+	RETURN trim(out);
+END;
+$$;
+
+
+-- public.geocode_cache definition
+
+CREATE TABLE IF NOT EXISTS public.geocode_cache (
+	search_text text NOT NULL PRIMARY KEY,   -- search key (postal or address)
+	blk_no text NULL,
+	road_name text NULL,
+	building text NULL,
+	address text NULL,
+	postal text NULL,
+	lat float8 NULL,
+	lon float8 NULL,
+	x float8 NULL,
+	y float8 NULL,
+	geom_4326 public.geometry(point, 4326) NULL,
+	geom_3414 public.geometry(point, 3414) NULL,
+	updated_at timestamptz DEFAULT now() NULL,
+	canonical_street text NULL
+);
+-- Tables created by the notebook predate canonical_street
+ALTER TABLE public.geocode_cache ADD COLUMN IF NOT EXISTS canonical_street text NULL;
+
+CREATE INDEX IF NOT EXISTS geocode_cache_postal_idx ON public.geocode_cache USING btree (postal);
+CREATE INDEX IF NOT EXISTS geocode_cache_geom_idx ON public.geocode_cache USING gist (geom_3414);
+CREATE INDEX IF NOT EXISTS idx_geo_canonical_street ON public.geocode_cache USING btree (canonical_street);
@@ -0,0 +1,40 @@
+-- Amenity geometry and indexes for the amenities-batch tool
+--
+-- sg_schools.csv ships without coordinates, so school points are filled in
+-- from geocode_cache by postal code (see ingest/geocode.py). Call
+-- public.refresh_sg_school_geoms() after reloading sg_schools or geocoding.
+
+
+-- Spatial indexes for nearest/within lookups in SVY21 metres
+
+CREATE INDEX IF NOT EXISTS sg_parks_geom_3414_idx ON public.sg_parks USING gist (geom_3414);
+CREATE INDEX IF NOT EXISTS sg_schools_geom_3414_idx ON public.sg_schools USING gist (geom_3414);
+
+
+-- public.refresh_sg_school_geoms definition
+
+CREATE OR REPLACE FUNCTION public.refresh_sg_school_geoms()
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+	n bigint;
+BEGIN
+	UPDATE public.sg_schools s
+	SET geom_4326 = g.geom_4326,
+		geom_3414 = g.geom_3414
+	FROM public.geocode_cache g
+	WHERE g.search_text = btrim(s.postal_code)
+	  AND g.geom_3414 IS NOT NULL
+	  AND s.geom_3414 IS DISTINCT FROM g.geom_3414;
+
+	GET DIAGNOSTICS n = ROW_COUNT;
+	RETURN n;
+END;
+$$;
+
+
+SELECT format('Located %s schools from geocode_cache', public.refresh_sg_school_geoms());
+
+ANALYZE public.sg_parks;
+ANALYZE public.sg_schools;
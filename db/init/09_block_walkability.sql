@@ -0,0 +1,71 @@
+-- Precomputed walkability per HDB block
+--
+-- geospatial-query's walkability_score used to LEFT JOIN sg_schools and
+-- sg_parks to the same point and COUNT both, so every school was counted
+-- once per park (and vice versa). This scores every block at once with
+-- independent, index-backed counts. list-hdb-flats joins the result, so
+-- ranking by walkability costs nothing per flat.
+-- Call public.refresh_hdb_block_walkability() after reloading
+-- hdb_property_info, mrt_exits, sg_parks or sg_schools.
+
+
+-- public.hdb_block_walkability definition
+
+CREATE TABLE IF NOT EXISTS public.hdb_block_walkability (
+	block text NOT NULL,
+	street text NOT NULL,
+	mrt_within_400m bool NOT NULL,
+	schools_800m int4 NOT NULL,
+	parks_500m int4 NOT NULL,
+	-- 50 for an MRT exit within 400 m + 5 per school (800 m) and park (500 m), up to 5 each
+	walk_score int4 NOT NULL,
+	updated_at timestamptz DEFAULT now() NULL,
+	PRIMARY KEY (block, street)
+);
+CREATE INDEX IF NOT EXISTS hdb_block_walkability_score_idx
+	ON public.hdb_block_walkability USING btree (walk_score DESC);
+
+
+-- public.refresh_hdb_block_walkability definition
+
+CREATE OR REPLACE FUNCTION public.refresh_hdb_block_walkability()
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+	n bigint;
+BEGIN
+	TRUNCATE public.hdb_block_walkability;
+
+	INSERT INTO public.hdb_block_walkability
+		(block, street, mrt_within_400m, schools_800m, parks_500m, walk_score)
+	SELECT
+		b.block, b.street, a.mrt, a.schools, a.parks,
+		(CASE WHEN a.mrt THEN 50 ELSE 0 END) + LEAST(a.schools, 5) * 5 + LEAST(a.parks, 5) * 5
+	FROM public.hdb_block_coords b
+	CROSS JOIN LATERAL (
+		SELECT
+			EXISTS (
+				SELECT 1 FROM public.mrt_exits m
+				WHERE ST_DWithin(m.geom_3414, b.geom_3414, 400)
+			) AS mrt,
+			(
+				SELECT COUNT(*) FROM public.sg_schools s
+				WHERE ST_DWithin(s.geom_3414, b.geom_3414, 800)
+			)::int AS schools,
+			(
+				SELECT COUNT(*) FROM public.sg_parks p
+				WHERE ST_DWithin(p.geom_3414, b.geom_3414, 500)
+			)::int AS parks
+	) a
+	WHERE b.geom_3414 IS NOT NULL;
+
+	GET DIAGNOSTICS n = ROW_COUNT;
+	RETURN n;
+END;
+$$;
+
+
+SELECT format('Scored walkability for %s blocks', public.refresh_hdb_block_walkability());
+
+ANALYZE public.hdb_block_walkability;
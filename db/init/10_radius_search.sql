@@ -0,0 +1,20 @@
+-- Indexes for the radius search tools
+--
+-- list-hdb-flats-near-mrt walks from a station's exits to blocks through
+-- the GiST indexes on mrt_exits.geom_3414 and hdb_block_coords.geom_3414.
+-- list-hdb-flats-within-radius ("within 400m of an MRT in <town>") filters
+-- on the precomputed nearest-exit distance instead, which is exactly "within
+-- the radius of any exit". Both then probe the resale table per block.
+
+
+CREATE INDEX IF NOT EXISTS hdb_block_nearest_mrt_distance_idx
+	ON public.hdb_block_nearest_mrt USING btree (distance_m);
+
+-- Per-block probes: newest sale of a block first. Supersedes the
+-- (block, street_name) index from 05_resale_indexes.sql
+CREATE INDEX IF NOT EXISTS hdb_resale_block_street_month_idx
+	ON public.hdb_combined_resale_flat_prices USING btree (block, street_name, month_date DESC);
+DROP INDEX IF EXISTS public.hdb_resale_block_street_idx;
+
+
+ANALYZE public.hdb_block_nearest_mrt;
@@ -0,0 +1,26 @@
+-- Metric geometry layer
+--
+-- Every tool measures in SVY21 (EPSG:3414), so distances and radii are
+-- metres and use the geom_3414 GiST indexes. Points given as WGS84
+-- lat/lon are projected once with public.svy21_point(); stored columns
+-- are never cast per row.
+
+
+-- public.svy21_point definition
+
+CREATE OR REPLACE FUNCTION public.svy21_point(lat float8, lon float8)
+RETURNS public.geometry
+LANGUAGE sql
+IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+	SELECT ST_Transform(ST_SetSRID(ST_Point(lon, lat), 4326), 3414)
+$$;
+
+
+-- No query uses geography(geom_4326); these only slowed down loads
+
+DROP INDEX IF EXISTS public.idx_hdb_geom_geog;
+DROP INDEX IF EXISTS public.idx_mrt_geom_geog;
+
+-- Duplicate of hdb_property_geom_idx
+DROP INDEX IF EXISTS public.idx_hdb_geom_3414;
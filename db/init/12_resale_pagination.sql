@@ -0,0 +1,21 @@
+-- Keyset pagination for list-hdb-flats
+--
+-- Pages run newest first by (month_date, id). The next page starts strictly
+-- after the last row of the previous one (after_month, after_id), so every
+-- page is the same index range scan however deep the user pages, unlike
+-- OFFSET. Adding the identity column rewrites the table once.
+
+
+ALTER TABLE public.hdb_combined_resale_flat_prices
+	ADD COLUMN IF NOT EXISTS id bigint GENERATED BY DEFAULT AS IDENTITY;
+
+-- Supersede the month-only indexes from 05_resale_indexes.sql
+CREATE INDEX IF NOT EXISTS hdb_resale_town_type_month_id_idx
+	ON public.hdb_combined_resale_flat_prices USING btree (town_key, flat_type_key, month_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS hdb_resale_town_month_id_idx
+	ON public.hdb_combined_resale_flat_prices USING btree (town_key, month_date DESC, id DESC);
+DROP INDEX IF EXISTS public.hdb_resale_town_type_month_idx;
+DROP INDEX IF EXISTS public.hdb_resale_town_month_idx;
+
+
+ANALYZE public.hdb_combined_resale_flat_prices;
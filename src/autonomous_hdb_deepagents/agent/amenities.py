@@ -0,0 +1,111 @@
+import os
+import json
+import asyncio
+from autonomous_hdb_deepagents.agent.state import PipelineState
+from autonomous_hdb_deepagents.agent.tools import load_tools
+from autonomous_hdb_deepagents.agent.spatial_index import get_amenity_index, svy21
+from autonomous_hdb_deepagents.agent.mrt import MRT_TIMEOUT_SECONDS
+from autonomous_hdb_deepagents.agent import metrics
+
+# Set AMENITIES=0 to skip the stage
+AMENITIES_ENABLED = os.getenv("AMENITIES", "1") != "0"
+# Counting radii, in metres; the defaults match the walkability score
+PARK_RADIUS_M = float(os.getenv("PARK_RADIUS_M", "500"))
+SCHOOL_RADIUS_M = float(os.getenv("SCHOOL_RADIUS_M", "800"))
+WALK_MRT_RADIUS_M = 400
+
+KINDS = {
+    "parks": ("nearest_park", "park_dist_m", "parks_nearby"),
+    "schools": ("nearest_school", "school_dist_m", "schools_nearby"),
+}
+
+def walk_score(mrt_dist_m, parks_nearby, schools_nearby):
+    """
+    Same 0-100 score as geospatial-query's walkability_score: 50 for an MRT
+    exit within 400 m, plus 5 per school and per park (up to 5 each).
+    """
+    score = 50 if mrt_dist_m is not None and mrt_dist_m <= WALK_MRT_RADIUS_M else 0
+    return score + min(schools_nearby or 0, 5) * 5 + min(parks_nearby or 0, 5) * 5
+
+def amenities_local(index, kind, coords, radius):
+    """Nearest amenity and count within radius per coordinate, from an in-process index."""
+    name_key, dist_key, count_key = KINDS[kind]
+    results = {}
+    for lat, lon in coords:
+        x, y = svy21(lat, lon)
+        hit = index.nearest(x, y)
+        results[(lat, lon)] = {
+            name_key: hit[1] if hit else None,
+            dist_key: hit[0] if hit else None,
+            count_key: index.count_within(x, y, radius),
+        }
+    return results
+
+async def amenities_batch(batch, coords, timeout=MRT_TIMEOUT_SECONDS):
+    """Every amenity feature for every coordinate with one amenities-batch call."""
+    res = await asyncio.wait_for(batch.ainvoke({
+        "lats": [lat for lat, _ in coords],
+        "lons": [lon for _, lon in coords],
+        "park_radius": PARK_RADIUS_M,
+        "school_radius": SCHOOL_RADIUS_M,
+    }), timeout)
+
+    if isinstance(res, str):
+        res = json.loads(res)
+
+    results = {}
+    for row in res or []:
+        idx = row.get("idx")
+        if not idx or idx > len(coords):
+            continue
+        results[coords[idx - 1]] = {k: row.get(k) for keys in KINDS.values() for k in keys}
+    return results
+
+async def amenities_node(state: PipelineState):
+    flats = state.get("enriched_flats") or []
+    if not AMENITIES_ENABLED or not flats:
+        return {}
+
+    coords = list({(f.get("lat"), f.get("lon")) for f in flats if f.get("lat") and f.get("lon")})
+    results = {c: {} for c in coords}
+    # list-hdb-flats joins hdb_block_walkability; those scores and counts are kept
+    precomputed = all(f.get("walk_score") is not None for f in flats)
+
+    # In-process indexes where available; one database round-trip for the rest
+    remote = []
+    for kind, radius in (("parks", PARK_RADIUS_M), ("schools", SCHOOL_RADIUS_M)):
+        index = get_amenity_index(kind)
+        if index is None:
+            remote.append(kind)
+            continue
+        for c, values in amenities_local(index, kind, coords, radius).items():
+            results[c].update(values)
+
+    if remote and coords and not precomputed:
+        batch = (await load_tools()).get("amenities-batch")
+        if batch is None:
+            print(f"[AMENITIES] No index or amenities-batch tool for {', '.join(remote)} → skip")
+        else:
+            try:
+                rows = await amenities_batch(batch, coords)
+                for c, values in rows.items():
+                    results[c].update({k: values.get(k) for kind in remote for k in KINDS[kind]})
+            except Exception as e:
+                print(f"[AMENITIES] Batch lookup failed: {e}")
+
+    source = "precomputed" if precomputed else f"database: {', '.join(remote) or 'none'}"
+    print(f"[AMENITIES] {len(coords)} coordinates ({source})")
+
+    for f in flats:
+        values = results.get((f.get("lat"), f.get("lon")))
+        if values is None:
+            continue
+        for k, v in values.items():
+            if f.get(k) is None:
+                f[k] = v
+        # Counts that failed to load are unknown, not zero: no score then
+        if f.get("walk_score") is None and f.get("parks_nearby") is not None and f.get("schools_nearby") is not None:
+            f["walk_score"] = walk_score(f.get("mrt_dist_m"), f.get("parks_nearby"), f.get("schools_nearby"))
+
+    metrics.stage_rows.observe(len(coords), stage="amenities")
+    return {"enriched_flats": flats}
@@ -0,0 +1,166 @@
+import re
+import json
+import time
+import sqlite3
+import asyncio
+from collections import OrderedDict
+
+_PUNCT_RE = re.compile(r"[^\w$.,/\s]|(?<!\d)[.,]|[.,](?!\d)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a user query for cache keys: case-folded, punctuation
+    dropped (decimal points and thousands separators inside numbers are kept)
+    and whitespace collapsed.
+    """
+    q = _PUNCT_RE.sub(" ", query.casefold())
+    return _SPACE_RE.sub(" ", q).strip()
+
+
+class SqliteBackend:
+    """On-disk key/value store so cache entries survive restarts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        row = self._conn.execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), stored_at),
+        )
+        self._conn.commit()
+
+    def delete(self, key):
+        self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def clear(self):
+        self._conn.execute("DELETE FROM cache")
+        self._conn.commit()
+
+
+class TTLCache:
+    """
+    In-memory LRU cache with per-entry TTL and hit/miss counters.
+
+    With a backend, writes go through to it and memory misses are looked up
+    there before counting as a miss. Backend values must be JSON-serializable.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, backend=None, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def _expired(self, stored_at):
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    def _put(self, key, value, stored_at):
+        self._data[key] = (value, stored_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None and self.backend is not None:
+            entry = self.backend.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                self._put(key, *entry)
+
+        if entry is None or self._expired(entry[1]):
+            if entry is not None:
+                self.delete(key)
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        stored_at = time.time()
+        self._put(key, value, stored_at)
+        if self.backend is not None:
+            self.backend.set(key, value, stored_at)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def clear(self):
+        self._data.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight task.
+
+    The first caller (the leader) starts the work; callers arriving before it
+    finishes await the same task and get the same result or exception.
+    Nothing is kept once it completes, so results must be treated as read-only
+    but are never stale. Each waiter is shielded, so one caller cancelling
+    (e.g. a client disconnect) doesn't cancel the work for the others.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self.leaders = 0
+        self.shared = 0
+        self._inflight = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Nobody may be left to await a failed task; don't warn about it
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "shared": self.shared,
+        }
@@ -1,6 +1,19 @@
+import os
 import asyncio
 from langchain_core.messages import AIMessage, HumanMessage
-from autonomous_hdb_deepagents.agent.deep_agent import deep_agent
+from autonomous_hdb_deepagents.agent.deep_agent import get_deep_agent
+from autonomous_hdb_deepagents.agent.pipeline import compiled_orchestrator
+from autonomous_hdb_deepagents.agent.intent_rules import parse_intent, INTENT_RULES_MIN_CONFIDENCE
+from autonomous_hdb_deepagents.agent import metrics
+from autonomous_hdb_deepagents.agent.cache import SingleFlight, normalize_query
+
+# "deep" routes through the DeepAgent, "direct" invokes the pipeline itself,
+# "auto" goes direct for queries the rule-based intent parser fully understands
+AGENT_MODE = os.getenv("AGENT_MODE", "deep")
+# Identical queries that arrive while one is running share its answer
+QUERY_SINGLEFLIGHT = os.getenv("QUERY_SINGLEFLIGHT", "1") == "1"
+
+query_flight = metrics.registry.track_singleflight(SingleFlight("query"))
 
 def extract_final_message(result):
     msgs = result.get("messages")
@@ -10,22 +23,57 @@ def extract_final_message(result):
                 return m.content
     return None
 
-async def run_cli(query: str):
-    result = await deep_agent.ainvoke({
-        "messages": [HumanMessage(content=query)]
-    })
-    return extract_final_message(result) or "No output extracted."
+async def run_cli(query: str, direct: bool = None):
+    """
+    Answer a query. direct=True skips the outer DeepAgent (and its routing LLM
+    calls) and runs the LangGraph pipeline directly; None uses AGENT_MODE.
+    """
+    return (await run_query(query, direct))["response"]
+
+async def run_query(query: str, direct: bool = None, cursor: str = None, paged: bool = False):
+    """
+    Like run_cli, but returns {"response", "next_cursor"}. Pass next_cursor
+    back with the same query to load the next page of flats. Pages always run
+    the pipeline directly; DeepAgent answers carry no cursor, so paged=True
+    routes like "auto" even under AGENT_MODE=deep.
+    """
+    if cursor:
+        direct = True
+    elif direct is None:
+        if AGENT_MODE == "auto" or (paged and AGENT_MODE != "direct"):
+            direct = parse_intent(query)[1] >= INTENT_RULES_MIN_CONFIDENCE
+        else:
+            direct = AGENT_MODE == "direct"
+
+    if not QUERY_SINGLEFLIGHT:
+        return await _answer(query, direct, cursor)
+    return await query_flight.do((normalize_query(query), direct, cursor), _answer, query, direct, cursor)
+
+async def _answer(query: str, direct: bool, cursor: str = None):
+    inputs = {"messages": [HumanMessage(content=query)]}
+    if direct:
+        inputs["cursor"] = cursor
+    runnable = compiled_orchestrator if direct else get_deep_agent()
+    result = await runnable.ainvoke(inputs, config={"callbacks": [metrics.callback_handler]})
+    return {
+        "response": extract_final_message(result) or "No output extracted.",
+        "next_cursor": result.get("next_cursor"),
+    }
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) < 2:
-        print("Usage: uv run agent/cli.py \"your query\"")
+    args = sys.argv[1:]
+    direct = "--direct" in args
+    args = [a for a in args if a != "--direct"]
+
+    if not args:
+        print("Usage: uv run agent/cli.py [--direct] \"your query\"")
         raise SystemExit
 
-    query = sys.argv[1]
+    query = args[0]
 
     async def main():
-        output = await run_cli(query)
+        output = await run_cli(query, direct=direct or None)
         print("\n=== FINAL RESPONSE ===\n")
         print(output)
 
@@ -1,13 +1,28 @@
 from deepagents import create_deep_agent
-from autonomous_hdb_deepagents.agent.llm import llm
+from autonomous_hdb_deepagents.agent.llm import get_llm
 from autonomous_hdb_deepagents.agent.pipeline import orchestrator_subagent
 
 system_prompt = """
 You are an HDB property finder. Always forward user queries to the orchestrator.
 """
 
-deep_agent = create_deep_agent(
-    model=llm,
-    system_prompt=system_prompt,
-    subagents=[orchestrator_subagent]
-)
+_deep_agent = None
+
+def build_deep_agent(model=None):
+    return create_deep_agent(
+        model=model or get_llm(),
+        system_prompt=system_prompt,
+        subagents=[orchestrator_subagent]
+    )
+
+def get_deep_agent():
+    """The shared DeepAgent, built on first use like the LLM it wraps."""
+    global _deep_agent
+    if _deep_agent is None:
+        _deep_agent = build_deep_agent()
+    return _deep_agent
+
+def __getattr__(name):
+    if name == "deep_agent":
+        return get_deep_agent()
+    raise AttributeError(name)
@@ -1,21 +1,32 @@
+import os
 import json
 from langchain_core.messages import HumanMessage
 from autonomous_hdb_deepagents.agent.state import PipelineState
-from autonomous_hdb_deepagents.agent.llm import llm
+from autonomous_hdb_deepagents.agent.llm import get_llm
+from autonomous_hdb_deepagents.agent.intent_rules import parse_intent, canonical_station, INTENT_RULES_MIN_CONFIDENCE
+from autonomous_hdb_deepagents.agent.cache import TTLCache, SqliteBackend, normalize_query
+from autonomous_hdb_deepagents.agent import metrics
 
-async def intent_node(state: PipelineState):
-    """
-    EXACT logic from your working agent.py
-    """
-    user_msg = None
-    for m in state.messages:
-        if isinstance(m, HumanMessage):
-            user_msg = m.content
-            break
+# Set INTENT_FAST_PATH=0 to always use the LLM
+INTENT_FAST_PATH = os.getenv("INTENT_FAST_PATH", "1") != "0"
 
-    if not user_msg:
-        return state
+# Intent cache keyed on the normalized query; INTENT_CACHE_PATH adds an on-disk backend
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "1024"))
+INTENT_CACHE_TTL = float(os.getenv("INTENT_CACHE_TTL", "86400"))
+INTENT_CACHE_PATH = os.getenv("INTENT_CACHE_PATH")
+
+intent_cache = TTLCache(
+    maxsize=INTENT_CACHE_SIZE,
+    ttl=INTENT_CACHE_TTL,
+    backend=SqliteBackend(INTENT_CACHE_PATH) if INTENT_CACHE_PATH else None,
+    name="intent",
+)
+metrics.registry.track_cache(intent_cache)
+
+# How often each path was taken since process start (hit rate = rules / total)
+intent_path_counts = {"cache": 0, "rules": 0, "llm": 0}
 
+async def extract_intent_llm(user_msg: str):
     prompt = f"""
 Extract user intent. Return JSON with all fields even if null:
 {{
@@ -30,14 +41,15 @@ RULES:
 - MRT mentions: "near <station> MRT", "next to <station>"
 - Town mentions: "in <town>"
 - Flat type: "4-room", "5 rm"
-- Price: "$500k", "under 600k"
+- Price: "$500k", "under 600k"; max_price is an upper bound only. For a
+  range use its upper value; "above 500k" is not a max_price
 - Radius: "within 800m"
 
 User query: "{user_msg}"
 Return JSON only.
 """
 
-    resp = await llm.ainvoke(prompt)
+    resp = await get_llm().ainvoke(prompt)
     content = resp.content.strip()
 
     # Strip markdown fences
@@ -50,15 +62,50 @@ Return JSON only.
         print("[INTENT] JSON parse error:", content)
         intent = {}
 
-    print("[INTENT] Parsed intent →", intent)
-
-    return PipelineState(
-        messages=state.messages,
-        flats=state.flats,
-        enriched_flats=state.enriched_flats,
-        town=intent.get("town").upper() if intent.get("town") else None,
-        flat_type=intent.get("flat_type"),
-        max_price=intent.get("max_price"),
-        mrt_radius=intent.get("mrt_radius"),
-        mrt_station=intent.get("mrt_station")
-    )
+    return intent
+
+async def intent_node(state: PipelineState):
+    """
+    Intent cache first, then the rule-based fast path, then LLM extraction
+    when the rules' confidence is low.
+    """
+    user_msg = None
+    for m in state.get("messages", []):
+        if isinstance(m, HumanMessage):
+            user_msg = m.content
+            break
+
+    if not user_msg:
+        return {}
+
+    cache_key = normalize_query(user_msg)
+    intent = intent_cache.get(cache_key)
+    source = "cache"
+
+    if intent is None and INTENT_FAST_PATH:
+        parsed, confidence = parse_intent(user_msg)
+        if confidence >= INTENT_RULES_MIN_CONFIDENCE:
+            intent, source = parsed, "rules"
+        else:
+            print(f"[INTENT] Rules confidence {confidence:.2f} → LLM")
+
+    if intent is None:
+        intent, source = await extract_intent_llm(user_msg), "llm"
+
+    # Don't pin LLM parse failures in the cache
+    if source != "cache" and intent:
+        intent_cache.set(cache_key, intent)
+
+    intent_path_counts[source] += 1
+    metrics.intent_paths.inc(source=source)
+    print(f"[INTENT] Parsed intent ({source}) →", intent)
+
+    return {
+        "town": intent.get("town").upper() if intent.get("town") else None,
+        "flat_type": intent.get("flat_type"),
+        "max_price": intent.get("max_price"),
+        "mrt_radius": intent.get("mrt_radius"),
+        # Tools match the station name exactly, so normalize it once here
+        "mrt_station": canonical_station(intent.get("mrt_station")),
+        "intent_source": source,
+    }
@@ -0,0 +1,227 @@
+import os
+import re
+import csv
+from autonomous_hdb_deepagents.agent.mrt_resolver import TOWN_CODE_MAP
+from autonomous_hdb_deepagents.agent.spatial_index import MRT_EXITS_CSV
+
+# Below this confidence intent_node falls back to the LLM
+INTENT_RULES_MIN_CONFIDENCE = float(os.getenv("INTENT_RULES_MIN_CONFIDENCE", "0.8"))
+
+TOWNS = sorted(set(TOWN_CODE_MAP.values()))
+# Common mentions that aren't the exact HDB town name
+TOWN_ALIASES = {
+    "KALLANG": "KALLANG/WHAMPOA",
+    "WHAMPOA": "KALLANG/WHAMPOA",
+    "KALLANG WHAMPOA": "KALLANG/WHAMPOA",
+    "CENTRAL": "CENTRAL AREA",
+    "CBD": "CENTRAL AREA",
+    "AMK": "ANG MO KIO",
+    "CCK": "CHOA CHU KANG",
+}
+
+FLAT_TYPE_PATTERNS = [
+    (re.compile(r"\b([1-5])\s*-?\s*(?:room|rm)s?\b", re.I), lambda m: f"{m.group(1)} ROOM"),
+    (re.compile(r"\bexec(?:utive)?\b", re.I), lambda m: "EXECUTIVE"),
+    (re.compile(r"\bmulti[\s-]?gen(?:eration)?\b", re.I), lambda m: "MULTI-GENERATION"),
+]
+
+# "within 800m", "800 m of", "1.2km from", "radius 500m"
+RADIUS_RE = re.compile(
+    r"(?:\b(?:within|radius(?:\s+of)?)\s+(\d+(?:\.\d+)?)\s*(km|kilometres?|kilometers?|m|metres?|meters?)\b)"
+    r"|(?:\b(\d+(?:\.\d+)?)\s*(km|kilometres?|kilometers?|m|metres?|meters?)\s+(?:of|from|to|walk)\b)",
+    re.I,
+)
+
+# "$500k", "500k", "$600,000", "1.2m", "under 550000", "above 500k"
+def _price_pattern(p=""):
+    return (
+        rf"(?P<{p}dollar>\$\s*)?(?P<{p}num>\d+(?:,\d{{3}})*(?:\.\d+)?)\s*"
+        rf"(?P<{p}unit>k\b|mil(?:lion)?\b|m\b)?"
+    )
+
+PRICE_RE = re.compile(
+    r"(?P<cue>\b(?:under|below|less than|max(?:imum)?|up to|within|budget(?: of)?"
+    r"|above|over|more than|at least|min(?:imum)?|from)\s*|[<>]=?\s*)?" + _price_pattern(),
+    re.I,
+)
+# "between 400k and 500k", "400k to 500k", "400-500k"
+PRICE_RANGE_RE = re.compile(
+    r"(?:\b(?:between|from)\s+)?" + _price_pattern("lo_") + r"\s*(?:-|–|\bto\b|\band\b)\s*" + _price_pattern("hi_"),
+    re.I,
+)
+# A minimum, not a maximum: "above 500k", "500k and above", "500k+"
+LOWER_BOUND_CUE = re.compile(r"^\s*(?:above|over|more than|at least|min(?:imum)?|from|>)", re.I)
+LOWER_BOUND_AFTER = re.compile(r"^\s*(?:\+|(?:and|or)\s+(?:above|more|over)\b)", re.I)
+
+# Words that introduce a place name the parser must recognise
+LOCATION_CUES = re.compile(r"\b(?:near|in|at|around|beside|next to|close to)\s+([a-z][a-z/'\-]*)", re.I)
+STATION_SUFFIX = re.compile(r"^\s*(?:mrt|lrt|station|interchange)\b", re.I)
+STATION_PREFIX = re.compile(r"\b(?:near|next to|around|beside|close to)\s+$", re.I)
+STATION_NAME_SUFFIX = re.compile(r"(?:\s+(?:mrt|lrt|station|interchange))+\s*$", re.I)
+GENERIC_PLACES = {"MRT", "LRT", "AN", "A", "THE", "STATION", "SINGAPORE", "SG", "TOWN", "AREA"}
+
+
+def _load_station_names(path=MRT_EXITS_CSV):
+    names = set()
+    try:
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                name = (row.get("station_name") or "").upper()
+                for suffix in (" MRT STATION", " LRT STATION"):
+                    if name.endswith(suffix):
+                        names.add(name[: -len(suffix)])
+    except OSError:
+        pass
+    return names
+
+
+STATIONS = _load_station_names() or set(TOWNS)
+
+# Longest names first so "BUKIT BATOK WEST" wins over "BUKIT BATOK"; aliases
+# are places too, or "Kallang" would only ever match the station
+_PLACES = sorted(set(TOWNS) | set(TOWN_ALIASES) | STATIONS, key=len, reverse=True)
+_PLACE_RE = re.compile(r"\b(" + "|".join(re.escape(p) for p in _PLACES) + r")\b", re.I)
+
+
+def canonical_town(name):
+    """
+    Exact HDB town name for a town mention (the town_key list-hdb-flats
+    matches on), or None if it is unknown or ambiguous.
+    """
+    if not name:
+        return None
+    key = re.sub(r"\s+", " ", name.replace("-", " ")).strip().upper()
+    if key in TOWNS:
+        return key
+    if key in TOWN_ALIASES:
+        return TOWN_ALIASES[key]
+    matches = [t for t in TOWNS if key in t]
+    return matches[0] if len(matches) == 1 else None
+
+
+def canonical_station(name):
+    """
+    Station name as the tools match it: upper case, without an "MRT/LRT
+    STATION" suffix ("Tampines MRT" → "TAMPINES").
+    """
+    if not name:
+        return None
+    key = STATION_NAME_SUFFIX.sub("", re.sub(r"\s+", " ", name)).strip().upper()
+    return key or None
+
+
+def _parse_radius(text):
+    m = RADIUS_RE.search(text)
+    if not m:
+        return None, text
+    value, unit = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+    meters = float(value) * (1000 if unit.lower().startswith("k") else 1)
+    return int(round(meters)), text[: m.start()] + " " + text[m.end():]
+
+
+def _price_value(num, unit, dollar, cue):
+    num = float(num.replace(",", ""))
+    unit = (unit or "").lower()
+    if unit == "k":
+        return int(num * 1_000)
+    if unit.startswith("mil") or (unit == "m" and (dollar or cue)):
+        return int(num * 1_000_000)
+    if unit == "m":
+        return None
+    if not dollar and num < 10_000:
+        # Bare small numbers are room counts, block numbers, etc.
+        return None
+    return int(num)
+
+
+def _parse_price(text):
+    """
+    (max_price, lower_bound, text). A range gives its upper value; a lower
+    bound ("above 500k") gives no max_price, since the tools only filter on a
+    maximum, and sets lower_bound.
+    """
+    for m in PRICE_RANGE_RE.finditer(text):
+        hi = _price_value(m.group("hi_num"), m.group("hi_unit"), m.group("hi_dollar"), True)
+        # "400-500k": the lower value shares the upper one's unit
+        lo = _price_value(m.group("lo_num"), m.group("lo_unit") or m.group("hi_unit"),
+                          m.group("lo_dollar") or m.group("hi_dollar"), True)
+        if hi and lo:
+            return max(lo, hi), False, text[: m.start()] + " " + text[m.end():]
+
+    for m in PRICE_RE.finditer(text):
+        value = _price_value(m.group("num"), m.group("unit"), m.group("dollar"), m.group("cue"))
+        if value is None:
+            continue
+        rest = text[: m.start()] + " " + text[m.end():]
+        if LOWER_BOUND_CUE.match(m.group("cue") or "") or LOWER_BOUND_AFTER.match(text[m.end():]):
+            return None, True, rest
+        return value, False, rest
+    return None, False, text
+
+
+def _parse_flat_type(text):
+    for pattern, build in FLAT_TYPE_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            return build(m), text[: m.start()] + " " + text[m.end():]
+    return None, text
+
+
+def parse_intent(query: str):
+    """
+    Deterministic intent parser for common query shapes.
+
+    Returns (intent, confidence). The intent has the same keys as the LLM
+    path; confidence is in [0, 1] and drops when the query mentions places
+    the gazetteer does not know or leaves numbers unexplained.
+    """
+    text = " " + query.strip() + " "
+    radius, text = _parse_radius(text)
+    max_price, lower_bound, text = _parse_price(text)
+    flat_type, text = _parse_flat_type(text)
+
+    town = None
+    station = None
+    places = set()
+    for m in _PLACE_RE.finditer(text):
+        name = m.group(1).upper()
+        town_name = name if name in TOWNS else TOWN_ALIASES.get(name)
+        is_station_ctx = STATION_SUFFIX.match(text[m.end():]) or STATION_PREFIX.search(text[: m.start()])
+        if name in STATIONS and (is_station_ctx or not town_name):
+            station = station or name
+            places.add(name)
+        elif town_name:
+            town = town or town_name
+            places.add(town_name)
+
+    intent = {
+        "town": town,
+        "mrt_station": station,
+        "flat_type": flat_type,
+        "max_price": max_price,
+        "mrt_radius": radius,
+    }
+
+    confidence = 1.0 if (town or station) else 0.0
+
+    # A place cue ("near X", "in X") we could not resolve means we likely missed a location
+    known = {p for p in (town, station) if p}
+    for m in LOCATION_CUES.finditer(text):
+        word = m.group(1).upper()
+        if word in GENERIC_PLACES or any(p.startswith(word) for p in known):
+            continue
+        if not _PLACE_RE.match(text, m.start(1)):
+            confidence -= 0.5
+
+    # Only one place and a price cap are expressible; "Tampines or Bedok" and
+    # "above 500k" go to the LLM
+    if len(places) > 1:
+        confidence -= 0.5
+    if lower_bound:
+        confidence -= 0.5
+
+    # Leftover numbers we could not attribute to price/radius/flat type
+    if re.search(r"\d", text):
+        confidence -= 0.3
+
+    return intent, max(0.0, confidence)
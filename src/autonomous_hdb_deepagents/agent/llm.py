@@ -1,10 +1,30 @@
 import os
 from langchain_openai import ChatOpenAI
 
-# Shared LLM instance for the whole package
-llm = ChatOpenAI(
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    base_url="https://openrouter.ai/api/v1",
-    model="amazon/nova-2-lite-v1:free",
-    temperature=0
-)
+_llm = None
+
+def get_llm():
+    """
+    Shared LLM instance for the whole package, built on first use so that
+    importing the pipeline needs no OpenRouter key (see set_llm).
+    """
+    global _llm
+    if _llm is None:
+        _llm = ChatOpenAI(
+            api_key=os.getenv("OPENROUTER_API_KEY"),
+            base_url="https://openrouter.ai/api/v1",
+            model="amazon/nova-2-lite-v1:free",
+            temperature=0
+        )
+    return _llm
+
+def set_llm(model):
+    """Use `model` (e.g. the bench's FakeChatModel) instead of OpenRouter."""
+    global _llm
+    _llm = model
+
+def __getattr__(name):
+    # `from ...llm import llm` still works, lazily
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(name)
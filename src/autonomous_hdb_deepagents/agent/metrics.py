@@ -0,0 +1,266 @@
+import os
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Optional OpenTelemetry spans (needs opentelemetry-api; an SDK/exporter must
+# be configured by the deployment for spans to go anywhere)
+OTEL_ENABLED = os.getenv("HDB_OTEL", "0") == "1"
+
+try:
+    if not OTEL_ENABLED:
+        raise ImportError
+    from opentelemetry import trace as otel_trace
+    tracer = otel_trace.get_tracer("autonomous_hdb_deepagents")
+except ImportError:
+    otel_trace = None
+    tracer = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (0, 1, 5, 10, 30, 100, 300, 1000)
+
+
+# ---------------------------------------------------------
+# Minimal Prometheus text-format registry
+# ---------------------------------------------------------
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v).replace(chr(34), chr(39))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self.values[key] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, v in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {v}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            s = self.series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s["counts"][i] += 1
+            s["sum"] += value
+            s["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, s in sorted(self.series.items()):
+            for b, c in zip(self.buckets, s["counts"]):
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (b,))} {c}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + ('+Inf',))} {s['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {s['sum']}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {s['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.caches = []
+        self.flights = []
+
+    def counter(self, *args, **kwargs):
+        m = Counter(*args, **kwargs)
+        self.metrics.append(m)
+        return m
+
+    def histogram(self, *args, **kwargs):
+        m = Histogram(*args, **kwargs)
+        self.metrics.append(m)
+        return m
+
+    def track_cache(self, cache):
+        """Export a TTLCache's hit/miss counters and size."""
+        self.caches.append(cache)
+        return cache
+
+    def track_singleflight(self, flight):
+        """Export a SingleFlight's leader/shared call counts."""
+        self.flights.append(flight)
+        return flight
+
+    def render(self) -> str:
+        lines = []
+        for m in self.metrics:
+            lines.extend(m.render())
+
+        if self.caches:
+            for metric, kind, field in (
+                ("hdb_cache_hits_total", "counter", "hits"),
+                ("hdb_cache_misses_total", "counter", "misses"),
+                ("hdb_cache_entries", "gauge", "size"),
+            ):
+                lines.append(f"# TYPE {metric} {kind}")
+                for c in self.caches:
+                    lines.append(f'{metric}{{cache="{c.name}"}} {c.stats()[field]}')
+
+        if self.flights:
+            lines.append("# TYPE hdb_singleflight_calls_total counter")
+            for f in self.flights:
+                st = f.stats()
+                for role in ("leaders", "shared"):
+                    lines.append(f'hdb_singleflight_calls_total{{group="{f.name}",role="{role}"}} {st[role]}')
+            lines.append("# TYPE hdb_singleflight_in_flight gauge")
+            for f in self.flights:
+                lines.append(f'hdb_singleflight_in_flight{{group="{f.name}"}} {f.stats()["in_flight"]}')
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+node_seconds = registry.histogram(
+    "hdb_node_duration_seconds", "Wall time per pipeline node", labels=("node",))
+node_errors = registry.counter(
+    "hdb_node_errors_total", "Pipeline node failures", labels=("node",))
+tool_seconds = registry.histogram(
+    "hdb_tool_call_duration_seconds", "Wall time per tool call", labels=("tool", "status"))
+llm_seconds = registry.histogram(
+    "hdb_llm_call_duration_seconds", "Wall time per LLM call", labels=("node",))
+llm_tokens = registry.counter(
+    "hdb_llm_tokens_total", "LLM tokens by direction", labels=("node", "type"))
+stage_rows = registry.histogram(
+    "hdb_stage_rows", "Rows produced per pipeline stage", labels=("stage",), buckets=ROW_BUCKETS)
+intent_paths = registry.counter(
+    "hdb_intent_path_total", "Intent extraction path taken", labels=("source",))
+
+
+# ---------------------------------------------------------
+# Spans
+# ---------------------------------------------------------
+@contextmanager
+def span(name, **attributes):
+    """OpenTelemetry span when enabled, otherwise a no-op."""
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as s:
+        yield s
+
+
+# ---------------------------------------------------------
+# Tool call instrumentation
+# ---------------------------------------------------------
+class InstrumentedTool:
+    """Wraps a tool so every ainvoke is timed and traced."""
+
+    def __init__(self, tool):
+        self._tool = tool
+        self.name = tool.name
+
+    def __getattr__(self, item):
+        return getattr(self._tool, item)
+
+    async def ainvoke(self, *args, **kwargs):
+        status = "ok"
+        start = time.perf_counter()
+        with span(f"tool {self.name}", tool=self.name):
+            try:
+                return await self._tool.ainvoke(*args, **kwargs)
+            except BaseException:
+                status = "error"
+                raise
+            finally:
+                tool_seconds.observe(time.perf_counter() - start, tool=self.name, status=status)
+
+
+# ---------------------------------------------------------
+# Node + LLM instrumentation via LangChain callbacks
+# ---------------------------------------------------------
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Times LangGraph nodes and LLM calls, and counts LLM tokens. Pass it in
+    the run config (config={"callbacks": [callback_handler]}); child runs
+    inherit it, including the DeepAgent's orchestrator subgraph.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._runs = {}
+
+    def _start(self, run_id, kind, label, parent_run_id=None):
+        s = None
+        if tracer is not None:
+            parent = self._runs.get(parent_run_id)
+            ctx = otel_trace.set_span_in_context(parent[3]) if parent and parent[3] else None
+            s = tracer.start_span(f"{kind} {label}", context=ctx)
+        self._runs[run_id] = (kind, label, time.perf_counter(), s)
+
+    def _finish(self, run_id, error=False):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        kind, label, start, s = run
+        elapsed = time.perf_counter() - start
+        if kind == "node":
+            node_seconds.observe(elapsed, node=label)
+            if error:
+                node_errors.inc(node=label)
+        elif kind == "llm":
+            llm_seconds.observe(elapsed, node=label)
+        if s is not None:
+            s.end()
+        return run
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node, parent_run_id)
+        elif parent_run_id is None:
+            self._start(run_id, "graph", kwargs.get("name") or "graph")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start(run_id, "llm", (metadata or {}).get("langgraph_node") or "unknown", parent_run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._finish(run_id)
+        if run is None:
+            return
+        for gens in response.generations:
+            for g in gens:
+                usage = getattr(getattr(g, "message", None), "usage_metadata", None) or {}
+                if usage:
+                    llm_tokens.inc(usage.get("input_tokens", 0), node=run[1], type="input")
+                    llm_tokens.inc(usage.get("output_tokens", 0), node=run[1], type="output")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+
+callback_handler = MetricsCallbackHandler()
+
+
+def render() -> str:
+    return registry.render()
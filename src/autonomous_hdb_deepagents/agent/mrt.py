@@ -1,6 +1,18 @@
+import os
 import json
+import asyncio
 from autonomous_hdb_deepagents.agent.state import PipelineState
 from autonomous_hdb_deepagents.agent.tools import load_tools
+from autonomous_hdb_deepagents.agent.mrt_resolver import DEFAULT_MRT_RADIUS
+from autonomous_hdb_deepagents.agent.spatial_index import get_mrt_index, svy21
+from autonomous_hdb_deepagents.agent import metrics
+
+# Max in-flight geospatial-query calls per request (1 = serial)
+MRT_CONCURRENCY = int(os.getenv("MRT_CONCURRENCY", "8"))
+# Per-call timeout in seconds
+MRT_TIMEOUT_SECONDS = float(os.getenv("MRT_TIMEOUT_SECONDS", "10"))
+
+NO_RESULT = {"nearest_mrt": None, "mrt_dist_m": None, "dist_formatted": "N/A"}
 
 def format_meters(meters):
     if meters < 1000:
@@ -10,71 +22,155 @@ def format_meters(meters):
         return f"{km:.1f}km"
     return f"{int(round(km))}km"
 
-async def mrt_node(state: PipelineState):
-    flats = state.flats
-    radius = state.mrt_radius or 800
+async def nearest_mrt(geo, lat, lon, radius):
+    res = await geo.ainvoke({
+        "mode": "nearest_mrt",
+        "lat": lat,
+        "lon": lon,
+        "radius": radius
+    })
+
+    if isinstance(res, str):
+        try: res = json.loads(res)
+        except: res = []
+
+    if not res:
+        return NO_RESULT
+
+    # geospatial-query measures in SVY21, so dist_m is already metres
+    best = res[0]
+    meters = best.get("dist_m")
+    if meters is None:
+        return NO_RESULT
+
+    return {
+        "nearest_mrt": best.get("label"),
+        "mrt_dist_m": meters,
+        "dist_formatted": format_meters(meters)
+    }
+
+async def enrich_coords(geo, coords, radius, concurrency=MRT_CONCURRENCY, timeout=MRT_TIMEOUT_SECONDS):
+    """
+    Look up the nearest MRT for every coordinate concurrently.
+
+    At most `concurrency` calls are in flight at once. A call that fails or
+    exceeds `timeout` yields NO_RESULT for that coordinate only.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(lat, lon):
+        async with sem:
+            try:
+                return await asyncio.wait_for(nearest_mrt(geo, lat, lon, radius), timeout)
+            except asyncio.TimeoutError:
+                print(f"[MRT] Timeout for ({lat}, {lon})")
+            except Exception as e:
+                print(f"[MRT] Lookup failed for ({lat}, {lon}): {e}")
+            return NO_RESULT
 
-    print(f"[MRT] Enriching {len(flats)} flats (radius={radius})")
+    results = await asyncio.gather(*(one(lat, lon) for lat, lon in coords))
+    return dict(zip(coords, results))
+
+async def nearest_mrt_batch(batch, coords, timeout=MRT_TIMEOUT_SECONDS):
+    """
+    Resolve every coordinate with a single nearest-mrt-batch call.
+    """
+    res = await asyncio.wait_for(batch.ainvoke({
+        "lats": [lat for lat, _ in coords],
+        "lons": [lon for _, lon in coords],
+    }), timeout)
+
+    if isinstance(res, str):
+        res = json.loads(res)
+
+    results = {c: NO_RESULT for c in coords}
+    for row in res or []:
+        idx = row.get("idx")
+        if not idx or idx > len(coords) or row.get("dist_m") is None:
+            continue
+        results[coords[idx - 1]] = {
+            "nearest_mrt": row.get("label"),
+            "mrt_dist_m": row["dist_m"],
+            "dist_formatted": format_meters(row["dist_m"])
+        }
+    return results
+
+def nearest_mrt_local(index, coords):
+    """Answer nearest-MRT lookups from the in-process exit index (metres)."""
+    results = {}
+    for lat, lon in coords:
+        hit = index.nearest(*svy21(lat, lon))
+        if hit is None:
+            results[(lat, lon)] = NO_RESULT
+            continue
+        meters, exit_ = hit
+        results[(lat, lon)] = {
+            "nearest_mrt": exit_["station_name"],
+            "mrt_dist_m": meters,
+            "dist_formatted": format_meters(meters)
+        }
+    return results
+
+async def nearest_mrt_remote(coords, radius):
+    """Database fallback: one batch call if possible, else per-point calls."""
+    if not coords:
+        return {}
 
     tools = await load_tools()
-    geo = tools["geospatial-query"]
+    batch = tools.get("nearest-mrt-batch")
+
+    if batch is not None and len(coords) > 1:
+        try:
+            return await nearest_mrt_batch(batch, coords)
+        except Exception as e:
+            print(f"[MRT] Batch lookup failed, falling back to per-point: {e}")
+
+    return await enrich_coords(tools["geospatial-query"], coords, radius)
+
+async def mrt_node(state: PipelineState):
+    flats = state.get("flats") or []
+    radius = state.get("mrt_radius") or DEFAULT_MRT_RADIUS
+
+    # Flats joined against hdb_block_nearest_mrt arrive already enriched
+    pending = []
+    for f in flats:
+        if f.get("nearest_mrt") and f.get("mrt_dist_m") is not None:
+            f["dist_formatted"] = format_meters(f["mrt_dist_m"])
+        else:
+            pending.append(f)
+
+    if not pending:
+        print(f"[MRT] {len(flats)} flats precomputed → skip lookups")
+        return {"enriched_flats": flats}
+
+    print(f"[MRT] Enriching {len(pending)}/{len(flats)} flats (radius={radius})")
 
     # Deduplicate coords
     uniq = {}
-    for f in flats:
+    for f in pending:
         lat, lon = f.get("lat"), f.get("lon")
         if lat and lon:
             uniq.setdefault((lat, lon), []).append(f)
 
-    coord_results = {}
-
-    for (lat, lon) in uniq:
-        res = await geo.ainvoke({
-            "mode": "nearest_mrt",
-            "lat": lat,
-            "lon": lon,
-            "radius": radius
-        })
-
-        if isinstance(res, str):
-            try: res = json.loads(res)
-            except: res = []
-
-        if not res:
-            coord_results[(lat, lon)] = {
-                "nearest_mrt": None,
-                "dist_formatted": "N/A"
-            }
-            continue
+    coords = list(uniq)
+    metrics.stage_rows.observe(len(coords), stage="mrt_lookup")
+    index = get_mrt_index()
 
-        best = res[0]
-        raw = best.get("dist_m")
-
-        # Determine unit from your working logic
-        if raw < 0.1:
-            meters = raw * 111000
-        elif raw < 1000:
-            meters = raw * 1000
-        else:
-            meters = raw
-
-        coord_results[(lat, lon)] = {
-            "nearest_mrt": best.get("label"),
-            "dist_formatted": format_meters(meters)
-        }
+    if index is not None:
+        coord_results = nearest_mrt_local(index, coords)
+    else:
+        coord_results = await nearest_mrt_remote(coords, radius)
 
     # Attach results
-    enriched = []
-    for f in flats:
+    for f in pending:
         lat, lon = f.get("lat"), f.get("lon")
         extra = coord_results.get((lat, lon), {})
         f["nearest_mrt"] = extra.get("nearest_mrt")
+        f["mrt_dist_m"] = extra.get("mrt_dist_m")
         f["dist_formatted"] = extra.get("dist_formatted")
-        enriched.append(f)
 
-    if enriched:
-        e = enriched[0]
+    if flats:
+        e = flats[0]
         print(f"[MRT] Example: {e['street_name']} → {e['nearest_mrt']} ({e['dist_formatted']})")
 
-    state.enriched_flats = enriched
-    return state
+    return {"enriched_flats": flats}
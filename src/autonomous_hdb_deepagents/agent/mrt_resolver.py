@@ -2,6 +2,9 @@ import json
 from autonomous_hdb_deepagents.agent.state import PipelineState
 from autonomous_hdb_deepagents.agent.tools import load_tools
 
+# Search radius around the station when the query doesn't give one (metres)
+DEFAULT_MRT_RADIUS = 800
+
 TOWN_CODE_MAP = {
     "AMK": "ANG MO KIO",
     "BB": "BUKIT BATOK",
@@ -33,16 +36,17 @@ TOWN_CODE_MAP = {
 }
 
 async def mrt_resolve_node(state: PipelineState):
-    if not state.mrt_station:
+    station = state.get("mrt_station")
+    if not station:
         print("[MRT-RESOLVE] No MRT station → skip")
-        return state
+        return {}
 
     tools = await load_tools()
     tool = tools["get-mrt-towns"]
 
-    print(f"[MRT-RESOLVE] Resolving MRT station: {state.mrt_station}")
+    print(f"[MRT-RESOLVE] Resolving MRT station: {station}")
 
-    res = await tool.ainvoke({"mrt_station": state.mrt_station})
+    res = await tool.ainvoke({"mrt_station": station})
 
     if isinstance(res, str):
         try: res = json.loads(res)
@@ -50,14 +54,21 @@ async def mrt_resolve_node(state: PipelineState):
 
     if not res:
         print("[MRT-RESOLVE] No results → skip")
-        return state
+        return {}
 
-    best = res[0]
-    town_code = best.get("town", "").upper()
-    resolved = TOWN_CODE_MAP.get(town_code)
+    # Towns with a block inside the search radius, nearest first; the best
+    # match is always kept so single-town search still has a town
+    radius = state.get("mrt_radius") or DEFAULT_MRT_RADIUS
+    towns = []
+    for row in res:
+        name = TOWN_CODE_MAP.get((row.get("town") or "").upper())
+        if not name or name in towns:
+            continue
+        if not towns or float(row.get("min_dist_m") or 0) <= radius:
+            towns.append(name)
 
-    if resolved:
-        print(f"[MRT-RESOLVE] {town_code} → {resolved}")
-        state.town = resolved
+    if not towns:
+        return {}
 
-    return state
+    print(f"[MRT-RESOLVE] {station} → {', '.join(towns)}")
+    return {"town": towns[0], "towns": towns}
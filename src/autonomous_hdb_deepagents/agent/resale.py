@@ -1,6 +1,41 @@
+import os
 import json
-from autonomous_hdb_deepagents.agent.state import PipelineState
+import math
+import base64
+import time
+import asyncio
+from autonomous_hdb_deepagents.agent.state import PipelineState, FlatRecord
 from autonomous_hdb_deepagents.agent.tools import load_tools
+from autonomous_hdb_deepagents.agent.cache import TTLCache
+from autonomous_hdb_deepagents.agent.intent_rules import canonical_town
+from autonomous_hdb_deepagents.agent.mrt_resolver import DEFAULT_MRT_RADIUS
+from autonomous_hdb_deepagents.agent import metrics
+
+# Default page size of list-hdb-flats
+RESULT_LIMIT = 30
+
+# list-hdb-flats result cache. Entries live until the data version changes
+# (RESALE_CACHE_TTL=0) or the TTL expires, whichever comes first.
+RESALE_CACHE_SIZE = int(os.getenv("RESALE_CACHE_SIZE", "256"))
+RESALE_CACHE_TTL = float(os.getenv("RESALE_CACHE_TTL", "0"))
+RESALE_PRICE_BUCKET = int(os.getenv("RESALE_PRICE_BUCKET", "50000"))
+# Bucket fetches over-fetch so a lower price cap still fills a page after filtering
+RESALE_BUCKET_OVERFETCH = int(os.getenv("RESALE_BUCKET_OVERFETCH", "3"))
+DATA_VERSION_CHECK_SECONDS = float(os.getenv("DATA_VERSION_CHECK_SECONDS", "60"))
+# How MRT queries search: "radius" (flats within the radius of the station's
+# exits, every town, one list-hdb-flats-near-mrt call), "towns" (list-hdb-flats
+# for every town the station serves, concurrently) or "town" (nearest town only).
+# Queries with an explicit radius always search by distance.
+MRT_SEARCH_MODE = os.getenv("MRT_SEARCH_MODE", "radius")
+
+flats_cache = TTLCache(maxsize=RESALE_CACHE_SIZE, ttl=RESALE_CACHE_TTL, name="list-hdb-flats")
+metrics.registry.track_cache(flats_cache)
+
+# get-resale-stats results; same data-version keying as flats_cache
+resale_stats_cache = TTLCache(maxsize=RESALE_CACHE_SIZE, ttl=RESALE_CACHE_TTL, name="get-resale-stats")
+metrics.registry.track_cache(resale_stats_cache)
+
+_data_version = {"value": None, "checked_at": None}
 
 def normalize_flat_type(ft):
     if not ft:
@@ -19,33 +54,279 @@ def normalize_flat_type(ft):
             return mappings[key]
     return ft
 
-async def resale_node(state: PipelineState):
-    town = (state.town or "TOA PAYOH").upper()
-    flat_type = normalize_flat_type(state.flat_type)
-    max_price = state.max_price or 600000
+def price_bucket(max_price):
+    return int(math.ceil(max_price / RESALE_PRICE_BUCKET) * RESALE_PRICE_BUCKET)
 
-    tools = await load_tools()
-    sql = tools["list-hdb-flats"]
+def invalidate_flats_cache():
+    """Drop cached results, e.g. right after an in-process data load."""
+    flats_cache.clear()
+    resale_stats_cache.clear()
+    _data_version["checked_at"] = None
 
-    print(f"[RESALE] Fetching {flat_type} in {town} <= {max_price}...")
+async def current_data_version(tools):
+    """
+    Data version from get-data-version, re-checked at most every
+    DATA_VERSION_CHECK_SECONDS. A new version clears the flats cache.
+    """
+    now = time.monotonic()
+    checked_at = _data_version["checked_at"]
+    if checked_at is not None and now - checked_at < DATA_VERSION_CHECK_SECONDS:
+        return _data_version["value"]
 
-    flats = await sql.ainvoke({
-        "town": town,
-        "max_price": max_price,
-        "flat_type": flat_type
-    })
+    _data_version["checked_at"] = now
+    tool = tools.get("get-data-version")
+    if tool is None:
+        return _data_version["value"]
+
+    try:
+        res = await tool.ainvoke({})
+        if isinstance(res, str):
+            res = json.loads(res)
+        version = res[0].get("version") if res else None
+    except Exception as e:
+        print(f"[RESALE] Data version check failed: {e}")
+        return _data_version["value"]
+
+    if version != _data_version["value"]:
+        if _data_version["value"] is not None:
+            print(f"[RESALE] Data version {_data_version['value']} → {version}, clearing cache")
+            flats_cache.clear()
+            resale_stats_cache.clear()
+        _data_version["value"] = version
+
+    return version
 
+def parse_rows(flats):
     if flats is None:
         flats = []
 
     if isinstance(flats, str):
         try: flats = json.loads(flats)
         except: flats = []
-        
+
     if not isinstance(flats, list):
         flats = []
 
-    print(f"[RESALE] Retrieved {len(flats)} flats")
+    return flats
+
+def encode_cursor(positions):
+    """
+    Opaque "load more" token. Per town: the [month, id] of the last row shown,
+    or None once the town is exhausted; towns not listed start at the top.
+    """
+    raw = json.dumps(positions, sort_keys=True, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; raises ValueError for a malformed token."""
+    if not token:
+        return {}
+    try:
+        positions = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return {str(t): None if p is None else (str(p[0]), int(p[1])) for t, p in positions.items()}
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+async def fetch_flats(sql, town, flat_type, max_price, limit=RESULT_LIMIT, after=None):
+    return parse_rows(await sql.ainvoke({
+        "town": town,
+        "max_price": max_price,
+        "flat_type": flat_type,
+        "limit": limit,
+        "after_month": after[0] if after else None,
+        "after_id": after[1] if after else None,
+    }))
+
+async def cached_fetch(sql, key, town, flat_type, max_price, limit, after=None):
+    rows = flats_cache.get(key)
+    if rows is None:
+        rows = await fetch_flats(sql, town, flat_type, max_price, limit, after)
+        flats_cache.set(key, rows)
+    return rows
+
+async def list_flats(tools, town, flat_type, max_price, after=None):
+    """
+    One page of list-hdb-flats behind the result cache, and whether more
+    rows follow it. `after` is the (month, id) of the previous page's last row.
+
+    First pages are fetched at the price-bucket ceiling (over-fetching by
+    RESALE_BUCKET_OVERFETCH) and filtered in memory, so nearby price caps
+    share one fetch. The filtered page is only exact if it overflows or the
+    bucket fetch was already complete; otherwise an exact fetch is made (and
+    cached under its own key). Exact fetches ask for one extra row to tell
+    whether there is a next page.
+    """
+    sql = tools["list-hdb-flats"]
+    version = await current_data_version(tools)
+
+    if after is None:
+        bucket = price_bucket(max_price)
+        bucket_limit = RESULT_LIMIT * max(1, RESALE_BUCKET_OVERFETCH)
+        rows = await cached_fetch(sql, (version, town, flat_type, bucket), town, flat_type, bucket, bucket_limit)
+        page = [r for r in rows if float(r.get("resale_price") or 0) <= max_price]
+        exact = len(page) > RESULT_LIMIT or len(rows) < bucket_limit
+    else:
+        exact = False
+
+    if not exact:
+        key = (version, town, flat_type, max_price, after)
+        page = await cached_fetch(sql, key, town, flat_type, max_price, RESULT_LIMIT + 1, after)
+
+    # Nodes downstream annotate flats in place; keep cached rows pristine
+    return [FlatRecord.from_row(r) for r in page[:RESULT_LIMIT]], len(page) > RESULT_LIMIT
 
-    state.flats = flats
-    return state
+async def list_flats_radius(tools, name, **params):
+    """
+    A radius tool (list-hdb-flats-near-mrt / -within-radius) behind the result
+    cache. Only in-radius rows are fetched, nearest first.
+    """
+    sql = tools[name]
+    version = await current_data_version(tools)
+    key = (version, name) + tuple(sorted(params.items()))
+
+    rows = flats_cache.get(key)
+    if rows is None:
+        rows = parse_rows(await sql.ainvoke({**params, "limit": RESULT_LIMIT}))
+        flats_cache.set(key, rows)
+    return [FlatRecord.from_row(r) for r in rows[:RESULT_LIMIT]]
+
+async def list_flats_towns(tools, towns, flat_type, max_price, positions=None):
+    """
+    One page of list-hdb-flats across towns and the cursor for the next one.
+
+    Each town is read from its own keyset position, concurrently. The pages
+    are merged newest first, so every row not shown stays after its town's
+    new position; the page shown is then ranked by distance to the nearest
+    MRT (where precomputed).
+    """
+    positions = positions or {}
+    live = [t for t in towns if positions.get(t, ()) is not None]
+    pages = await asyncio.gather(*(list_flats(tools, t, flat_type, max_price, positions.get(t)) for t in live))
+
+    merged = sorted(
+        ((f, t) for t, (page, _) in zip(live, pages) for f in page),
+        key=lambda ft: (ft[0].get("month") or "", ft[0].get("id") or 0),
+        reverse=True,
+    )[:RESULT_LIMIT]
+    flats = [f for f, _ in merged]
+
+    next_positions = dict(positions)
+    for t, (page, more) in zip(live, pages):
+        shown = [f for f, town in merged if town == t]
+        if shown:
+            next_positions[t] = [shown[-1].get("month"), shown[-1].get("id")]
+        if len(shown) == len(page) and not more:
+            next_positions[t] = None
+
+    # Rows without a month and id (an older list-hdb-flats) can't be paged
+    pageable = all(f.get("month") and f.get("id") is not None for f in flats)
+    has_more = any(next_positions.get(t, ()) is not None for t in towns)
+    cursor = encode_cursor(next_positions) if pageable and has_more else None
+
+    if len(towns) > 1:
+        flats.sort(key=lambda f: (f.get("mrt_dist_m") is None, f.get("mrt_dist_m") or 0))
+    return flats, cursor
+
+async def search_flats(tools, state, towns, flat_type, max_price, positions=None):
+    """
+    Pick the query path: by distance from the station's exits, by distance
+    from any MRT within a town, or by town name. Returns the flats and the
+    next-page cursor; only searches by town are paged.
+    """
+    station = state.get("mrt_station")
+    radius = state.get("mrt_radius") or DEFAULT_MRT_RADIUS
+    # An explicit radius ("within 400m") is a filter, not a label
+    explicit = state.get("mrt_radius") is not None
+
+    if station and (explicit or MRT_SEARCH_MODE == "radius") and "list-hdb-flats-near-mrt" in tools:
+        try:
+            flats = await list_flats_radius(
+                tools, "list-hdb-flats-near-mrt",
+                mrt_station=station, radius=radius, max_price=max_price, flat_type=flat_type,
+            )
+            if flats or explicit:
+                return flats, None
+            print(f"[RESALE] Nothing within {radius}m of {station} → search by town")
+        except Exception as e:
+            print(f"[RESALE] Radius search failed, searching by town: {e}")
+
+    elif not station and explicit and "list-hdb-flats-within-radius" in tools:
+        try:
+            pages = await asyncio.gather(*(
+                list_flats_radius(
+                    tools, "list-hdb-flats-within-radius",
+                    town=t, radius=radius, max_price=max_price, flat_type=flat_type,
+                )
+                for t in towns
+            ))
+            flats = sorted((f for page in pages for f in page), key=lambda f: f.get("mrt_dist_m") or 0)
+            return flats[:RESULT_LIMIT], None
+        except Exception as e:
+            print(f"[RESALE] Radius search failed, searching by town: {e}")
+
+    if MRT_SEARCH_MODE == "town":
+        towns = towns[:1]
+    return await list_flats_towns(tools, towns, flat_type, max_price, positions)
+
+async def resale_stats(tools, town, flat_type):
+    """
+    Trailing-12-month market stats for town × flat type from get-resale-stats.
+    Optional: returns [] if the tool is missing or fails.
+    """
+    tool = tools.get("get-resale-stats")
+    if tool is None:
+        return []
+
+    version = await current_data_version(tools)
+    key = (version, town, flat_type)
+    rows = resale_stats_cache.get(key)
+    if rows is not None:
+        return rows
+
+    try:
+        rows = await tool.ainvoke({"town": town, "flat_type": flat_type})
+        if isinstance(rows, str):
+            rows = json.loads(rows)
+    except Exception as e:
+        print(f"[RESALE] Stats lookup failed: {e}")
+        return []
+
+    rows = rows if isinstance(rows, list) else []
+    resale_stats_cache.set(key, rows)
+    return rows
+
+async def resale_node(state: PipelineState):
+    # list-hdb-flats matches the exact (indexed) town_key
+    town = canonical_town(state.get("town")) or (state.get("town") or "TOA PAYOH").upper()
+    towns = [canonical_town(t) or t.upper() for t in state.get("towns") or []] or [town]
+    flat_type = normalize_flat_type(state.get("flat_type"))
+    max_price = state.get("max_price") or 600000
+
+    tools = await load_tools()
+
+    try:
+        positions = decode_cursor(state.get("cursor"))
+    except ValueError as e:
+        print(f"[RESALE] {e} → first page")
+        positions = {}
+
+    station, radius = state.get("mrt_station"), state.get("mrt_radius")
+    where = f"near {station} ({', '.join(towns)})" if station else f"in {town}"
+    if radius is not None:
+        where += f" within {radius}m" + ("" if station else " of an MRT")
+    page = " (next page)" if positions else ""
+    print(f"[RESALE] Fetching {flat_type} {where} <= {max_price}{page}...")
+
+    (flats, next_cursor), *stats = await asyncio.gather(
+        search_flats(tools, state, towns, flat_type, max_price, positions),
+        *(resale_stats(tools, t, flat_type) for t in towns),
+    )
+
+    print(f"[RESALE] Retrieved {len(flats)} flats" + (", more available" if next_cursor else ""))
+    metrics.stage_rows.observe(len(flats), stage="resale")
+
+    return {
+        "flats": flats,
+        "next_cursor": next_cursor,
+        "resale_stats": [row for rows in stats for row in rows],
+    }
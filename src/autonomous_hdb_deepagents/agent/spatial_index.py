@@ -0,0 +1,269 @@
+import os
+import csv
+import math
+from pathlib import Path
+
+# Repo checkout layout: <root>/src/autonomous_hdb_deepagents/agent/spatial_index.py
+DATA_DIR = Path(os.getenv("HDB_DATA_DIR", Path(__file__).resolve().parents[3] / "db" / "init" / "data"))
+MRT_EXITS_CSV = os.getenv("MRT_EXITS_CSV", str(DATA_DIR / "mrt_exits.csv"))
+# Set MRT_INDEX=0 to always use the database tools
+MRT_INDEX_ENABLED = os.getenv("MRT_INDEX", "1") != "0"
+GRID_CELL_METERS = float(os.getenv("GRID_CELL_METERS", "500"))
+# Amenity point sources: kind → (CSV path, label column). Set AMENITY_INDEX=0
+# to always use the amenities-batch tool
+AMENITY_SOURCES = {
+    "parks": (os.getenv("PARKS_CSV", str(DATA_DIR / "sg_parks.csv")), "name"),
+    "schools": (os.getenv("SCHOOLS_CSV", str(DATA_DIR / "sg_schools.csv")), "school_name"),
+}
+AMENITY_INDEX_ENABLED = os.getenv("AMENITY_INDEX", "1") != "0"
+
+# ---------------------------------------------------------
+# WGS84 → SVY21 (EPSG:3414) transverse Mercator projection
+# ---------------------------------------------------------
+_A = 6378137.0
+_F = 1 / 298.257223563
+_ORIGIN_LAT = 1.366666
+_ORIGIN_LON = 103.833333
+_FALSE_NORTHING = 38744.572
+_FALSE_EASTING = 28001.642
+_K = 1.0
+
+_E2 = (2 * _F) - (_F * _F)
+_E4 = _E2 * _E2
+_E6 = _E4 * _E2
+_A0 = 1 - (_E2 / 4) - (3 * _E4 / 64) - (5 * _E6 / 256)
+_A2 = (3 / 8) * (_E2 + (_E4 / 4) + (15 * _E6 / 128))
+_A4 = (15 / 256) * (_E4 + (3 * _E6 / 4))
+_A6 = 35 * _E6 / 3072
+
+
+def _meridian_distance(lat_r):
+    return _A * ((_A0 * lat_r) - (_A2 * math.sin(2 * lat_r)) + (_A4 * math.sin(4 * lat_r)) - (_A6 * math.sin(6 * lat_r)))
+
+
+_M0 = _meridian_distance(math.radians(_ORIGIN_LAT))
+
+
+def svy21(lat, lon):
+    """Project a WGS84 lat/lon to SVY21 (x, y) in metres."""
+    lat_r = math.radians(lat)
+    sin_lat = math.sin(lat_r)
+    cos_lat = math.cos(lat_r)
+    sin2 = sin_lat * sin_lat
+
+    rho = _A * (1 - _E2) / math.pow(1 - _E2 * sin2, 1.5)
+    v = _A / math.sqrt(1 - _E2 * sin2)
+    psi = v / rho
+    t = math.tan(lat_r)
+    w = math.radians(lon - _ORIGIN_LON)
+
+    w2 = w * w
+    w4 = w2 * w2
+    w6 = w4 * w2
+    w8 = w6 * w2
+    psi2 = psi * psi
+    psi3 = psi2 * psi
+    psi4 = psi3 * psi
+    t2 = t * t
+    t4 = t2 * t2
+    t6 = t4 * t2
+    cos2 = cos_lat ** 2
+    cos3 = cos_lat ** 3
+    cos4 = cos_lat ** 4
+    cos5 = cos_lat ** 5
+    cos6 = cos_lat ** 6
+    cos7 = cos_lat ** 7
+
+    n1 = w2 / 2 * v * sin_lat * cos_lat
+    n2 = w4 / 24 * v * sin_lat * cos3 * (4 * psi2 + psi - t2)
+    n3 = w6 / 720 * v * sin_lat * cos5 * (
+        (8 * psi4) * (11 - 24 * t2) - (28 * psi3) * (1 - 6 * t2) + psi2 * (1 - 32 * t2) - psi * 2 * t2 + t4
+    )
+    n4 = w8 / 40320 * v * sin_lat * cos7 * (1385 - 3111 * t2 + 543 * t4 - t6)
+    y = _FALSE_NORTHING + _K * (_meridian_distance(lat_r) - _M0 + n1 + n2 + n3 + n4)
+
+    e1 = w2 / 6 * cos2 * (psi - t2)
+    e2 = w4 / 120 * cos4 * ((4 * psi3) * (1 - 6 * t2) + psi2 * (1 + 8 * t2) - psi * 2 * t2 + t4)
+    e3 = w6 / 5040 * cos6 * (61 - 479 * t2 + 179 * t4 - t6)
+    x = _FALSE_EASTING + _K * v * w * cos_lat * (1 + e1 + e2 + e3)
+
+    return x, y
+
+
+def parse_point(wkt):
+    """Parse 'POINT (x y)' into (x, y); returns None for empty values."""
+    if not wkt or "(" not in wkt:
+        return None
+    x, y = wkt[wkt.index("(") + 1:wkt.rindex(")")].split()
+    return float(x), float(y)
+
+
+# ---------------------------------------------------------
+# Uniform grid index over SVY21 metres
+# ---------------------------------------------------------
+class SpatialGrid:
+    """
+    Uniform grid over projected (x, y) points with an arbitrary payload each.
+    Distances are Euclidean in the projection's units (metres for SVY21).
+    """
+
+    def __init__(self, points, cell=GRID_CELL_METERS):
+        self.cell = cell
+        self.cells = {}
+        self.size = 0
+        for x, y, payload in points:
+            self.cells.setdefault(self._key(x, y), []).append((x, y, payload))
+            self.size += 1
+
+        if self.cells:
+            kx = [k[0] for k in self.cells]
+            ky = [k[1] for k in self.cells]
+            self._bounds = (min(kx), max(kx), min(ky), max(ky))
+        else:
+            self._bounds = (0, 0, 0, 0)
+
+    def _key(self, x, y):
+        return int(x // self.cell), int(y // self.cell)
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def _max_ring(self, cx, cy):
+        x0, x1, y0, y1 = self._bounds
+        return max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+
+    def nearest(self, x, y):
+        """Return (distance, payload) of the closest point, or None if empty."""
+        if not self.size:
+            return None
+
+        cx, cy = self._key(x, y)
+        best_d2, best = math.inf, None
+
+        for r in range(self._max_ring(cx, cy) + 1):
+            # Every point in ring r or beyond is at least r-1 cells away
+            if best is not None and best_d2 <= ((r - 1) * self.cell) ** 2:
+                break
+            for key in self._ring(cx, cy, r):
+                for px, py, payload in self.cells.get(key, ()):
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 < best_d2:
+                        best_d2, best = d2, payload
+
+        return math.sqrt(best_d2), best
+
+    def within(self, x, y, radius):
+        """Return [(distance, payload)] for points within radius, closest first."""
+        cx, cy = self._key(x, y)
+        reach = int(math.ceil(radius / self.cell))
+        r2 = radius * radius
+        hits = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                for px, py, payload in self.cells.get((cx + dx, cy + dy), ()):
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 <= r2:
+                        hits.append((math.sqrt(d2), payload))
+        hits.sort(key=lambda h: h[0])
+        return hits
+
+    def count_within(self, x, y, radius):
+        """Number of points within radius (within() without building or sorting hits)."""
+        cx, cy = self._key(x, y)
+        reach = int(math.ceil(radius / self.cell))
+        r2 = radius * radius
+        n = 0
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                for px, py, _ in self.cells.get((cx + dx, cy + dy), ()):
+                    if (px - x) ** 2 + (py - y) ** 2 <= r2:
+                        n += 1
+        return n
+
+
+# ---------------------------------------------------------
+# MRT exit index (loaded once per process)
+# ---------------------------------------------------------
+def load_mrt_exit_index(path=MRT_EXITS_CSV):
+    points = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            xy = parse_point(row.get("geom_3414"))
+            if xy is None:
+                continue
+            points.append((xy[0], xy[1], {
+                "station_name": row["station_name"],
+                "exit_code": row["exit_code"],
+            }))
+    return SpatialGrid(points)
+
+
+_mrt_index = None
+_mrt_index_loaded = False
+
+
+def get_mrt_index():
+    """
+    Return the process-wide MRT exit index, or None when it is disabled or the
+    exits CSV is not available (callers then fall back to the database tools).
+    """
+    global _mrt_index, _mrt_index_loaded
+
+    if not _mrt_index_loaded:
+        _mrt_index_loaded = True
+        if MRT_INDEX_ENABLED:
+            try:
+                _mrt_index = load_mrt_exit_index()
+                print(f"[INDEX] Loaded {_mrt_index.size} MRT exits from {MRT_EXITS_CSV}")
+            except OSError as e:
+                print(f"[INDEX] MRT exit index unavailable ({e}) → using database tools")
+
+    return _mrt_index
+
+
+# ---------------------------------------------------------
+# Amenity indexes (parks, schools), loaded once per process
+# ---------------------------------------------------------
+def load_point_index(path, label):
+    """SpatialGrid over a CSV's geom_3414 column, payload = the label column."""
+    points = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            xy = parse_point(row.get("geom_3414"))
+            if xy is not None:
+                points.append((xy[0], xy[1], row[label]))
+    return SpatialGrid(points)
+
+
+_amenity_indexes = {}
+
+
+def get_amenity_index(kind):
+    """
+    Return the process-wide index for an AMENITY_SOURCES kind, or None when it
+    is disabled, the CSV is missing, or it has no coordinates (sg_schools.csv
+    ships without them; the database fills them in from geocode_cache).
+    """
+    if kind not in _amenity_indexes:
+        index = None
+        if AMENITY_INDEX_ENABLED:
+            path, label = AMENITY_SOURCES[kind]
+            try:
+                index = load_point_index(path, label)
+                print(f"[INDEX] Loaded {index.size} {kind} from {path}")
+            except OSError as e:
+                print(f"[INDEX] {kind} index unavailable ({e}) → using database tools")
+            if index is not None and not index.size:
+                print(f"[INDEX] {path} has no coordinates → using database tools for {kind}")
+                index = None
+        _amenity_indexes[kind] = index
+
+    return _amenity_indexes[kind]
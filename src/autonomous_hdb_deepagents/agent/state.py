@@ -1,17 +1,97 @@
-from typing import List, Dict, Optional
-from pydantic import BaseModel, ConfigDict
+from typing import Annotated, Dict, List, Optional, TypedDict
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
 
-class PipelineState(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    messages: List[BaseMessage] = []
-    flats: List[Dict] = []
-    enriched_flats: List[Dict] = []
+class FlatRecord:
+    """
+    Compact row for one resale flat.
+
+    Known columns live in __slots__; anything else a tool returns goes into
+    `extra`. Supports the dict-style access nodes already use (get, [], in).
+    """
+
+    FIELDS = (
+        "town", "block", "street_name", "flat_type", "resale_price", "lat", "lon",
+        "nearest_mrt", "nearest_exit", "mrt_dist_m", "top_stations", "dist_formatted",
+        "station_dist_m", "nearest_park", "park_dist_m", "parks_nearby",
+        "nearest_school", "school_dist_m", "schools_nearby", "walk_score",
+        "month", "id",
+    )
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, **values):
+        for k in self.FIELDS:
+            setattr(self, k, values.pop(k, None))
+        self.extra = values or None
+
+    @classmethod
+    def from_row(cls, row: dict) -> "FlatRecord":
+        return cls(**row)
+
+    def get(self, key, default=None):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in self.FIELDS or bool(self.extra and key in self.extra)
+
+    def to_dict(self) -> dict:
+        d = {k: getattr(self, k) for k in self.FIELDS}
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def __repr__(self):
+        return f"FlatRecord({self.block} {self.street_name}, {self.flat_type}, {self.resale_price})"
+
+
+class PipelineState(TypedDict, total=False):
+    """
+    Pipeline state. Nodes return partial updates (dicts of changed fields);
+    LangGraph merges them, and messages are appended via add_messages.
+
+    A TypedDict rather than a Pydantic model: LangGraph hands nodes the
+    channel values as-is, with no per-node validation or copying of the
+    flat lists. Every key is optional; nodes read with state.get().
+    """
+
+    messages: Annotated[List[BaseMessage], add_messages]
+    flats: List[FlatRecord]
+    enriched_flats: List[FlatRecord]
+    # Trailing-12-month market stats for the searched town × flat type
+    resale_stats: List[Dict]
+    # Every town the searched MRT station serves, nearest first (mrt_resolve)
+    towns: List[str]
+    # "Load more": the cursor this page continues from, and the one after it
+    # (None when there is nothing more)
+    cursor: Optional[str]
+    next_cursor: Optional[str]
 
     # Intent fields
-    town: Optional[str] = None
-    flat_type: Optional[str] = None
-    max_price: Optional[int] = None
-    mrt_radius: Optional[int] = None
-    mrt_station: Optional[str] = None
+    town: Optional[str]
+    flat_type: Optional[str]
+    max_price: Optional[int]
+    mrt_radius: Optional[int]
+    mrt_station: Optional[str]
+    # "cache", "rules" (fast path) or "llm"
+    intent_source: Optional[str]
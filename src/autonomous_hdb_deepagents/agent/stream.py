@@ -0,0 +1,83 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from autonomous_hdb_deepagents.agent.pipeline import compiled_orchestrator
+from autonomous_hdb_deepagents.agent import metrics
+
+INTENT_FIELDS = ("town", "mrt_station", "flat_type", "max_price", "mrt_radius")
+
+
+def _field(output, name, default=None):
+    # Node outputs are partial-update dicts; the graph's final output is the full state
+    if isinstance(output, dict):
+        return output.get(name, default)
+    return getattr(output, name, default)
+
+
+def stage_event(node, output):
+    """Translate a finished pipeline node into a client-facing progress event."""
+    if node == "intent":
+        return {
+            "event": "intent",
+            "intent": {k: _field(output, k) for k in INTENT_FIELDS},
+            "source": _field(output, "intent_source"),
+        }
+    if node == "mrt_resolve":
+        return {"event": "town_resolved", "town": _field(output, "town"), "towns": _field(output, "towns") or []}
+    if node == "resale":
+        return {
+            "event": "flats_fetched",
+            "count": len(_field(output, "flats") or []),
+            "next_cursor": _field(output, "next_cursor"),
+        }
+    if node == "mrt":
+        return {"event": "enriched", "count": len(_field(output, "enriched_flats") or [])}
+    if node == "amenities":
+        return {"event": "amenities", "count": len(_field(output, "enriched_flats") or [])}
+    return None
+
+
+def final_message(output):
+    for m in reversed(_field(output, "messages") or []):
+        if isinstance(m, AIMessage):
+            return m.content
+    return None
+
+
+async def stream_query(query: str, cursor: str = None):
+    """
+    Run the pipeline and yield events as they happen:
+    intent → town_resolved → flats_fetched → enriched → amenities → token* → done.
+    Summary tokens are forwarded as the LLM generates them. `cursor` continues
+    from a previous page; "done" carries the next one.
+    """
+    yield {"event": "start", "query": query}
+
+    response = next_cursor = None
+    try:
+        async for ev in compiled_orchestrator.astream_events(
+            {"messages": [HumanMessage(content=query)], "cursor": cursor},
+            version="v2",
+            config={"callbacks": [metrics.callback_handler]},
+        ):
+            kind = ev["event"]
+            node = ev.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_chat_model_stream" and node == "summary":
+                text = ev["data"]["chunk"].content
+                if text:
+                    yield {"event": "token", "text": text}
+
+            elif kind == "on_chain_end" and node == ev["name"]:
+                stage = stage_event(node, ev["data"].get("output"))
+                if stage:
+                    if stage["event"] == "flats_fetched":
+                        next_cursor = stage["next_cursor"]
+                    yield stage
+
+            elif kind == "on_chain_end" and not ev.get("parent_ids"):
+                response = final_message(ev["data"].get("output"))
+    except Exception as e:
+        print(f"[STREAM] Pipeline failed: {e}")
+        yield {"event": "error", "message": str(e)}
+        return
+
+    yield {"event": "done", "response": response or "No output extracted.", "next_cursor": next_cursor}
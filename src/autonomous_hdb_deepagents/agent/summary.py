@@ -1,10 +1,26 @@
 import json
 from langchain_core.messages import AIMessage
 from autonomous_hdb_deepagents.agent.state import PipelineState
-from autonomous_hdb_deepagents.agent.llm import llm
+from autonomous_hdb_deepagents.agent.llm import get_llm
+
+def _money(v):
+    return f"${v:,.0f}" if v is not None else "N/A"
+
+def format_stats(stats):
+    """One line per town × flat type from get-resale-stats."""
+    lines = []
+    for s in stats:
+        lines.append(
+            f"- {s.get('town')} {s.get('flat_type')}, {s.get('from_month')} to {s.get('to_month')} "
+            f"({s.get('txn_count')} sales): median {_money(s.get('median_price'))}, "
+            f"middle 50% {_money(s.get('p25_price'))}–{_money(s.get('p75_price'))}, "
+            f"range {_money(s.get('min_price'))}–{_money(s.get('max_price'))}, "
+            f"median {_money(s.get('median_price_psm'))}/sqm"
+        )
+    return "\n".join(lines)
 
 async def summary_node(state: PipelineState):
-    flats = state.enriched_flats or []
+    flats = state.get("enriched_flats") or []
     print("[SUMMARY] Summarizing", len(flats), "flats")
 
     if not flats:
@@ -12,32 +28,49 @@ async def summary_node(state: PipelineState):
     else:
         preview = [
             {
+                "town": f.get("town"),
                 "block": f.get("block"),
                 "street": f.get("street_name"),
                 "price": f"${f.get('resale_price',0):,}",
                 "nearest_mrt": f.get("nearest_mrt"),
-                "distance": f.get("dist_formatted")
+                "distance": f.get("dist_formatted"),
+                "walk_score": f.get("walk_score"),
+                "parks_nearby": f.get("parks_nearby"),
+                "schools_nearby": f.get("schools_nearby"),
             }
             for f in flats[:5]
         ]
 
-        prompt = f"""
-Summarize HDB flats near {state.mrt_station or state.town or "the area"}.
+        stats = format_stats(state.get("resale_stats") or [])
+        market = f"""
+Market stats (exact, from all transactions; cite these numbers as given):
+{stats}
+""" if stats else ""
+
+        area = state.get("mrt_station") or state.get("town") or "the area"
+        towns = state.get("towns") or []
+        if len(towns) > 1:
+            area += f" (towns: {', '.join(towns)})"
 
+        more = "These are further results the user asked to load; don't repeat earlier advice.\n" if state.get("cursor") else ""
+
+        prompt = f"""
+Summarize HDB flats near {area}.
+{more}
 Preview:
 {json.dumps(preview, indent=2)}
 
 Total: {len(flats)}
-
+{market}
 Include:
-- Price range
+- Price range (use the market stats when given)
 - Closest flats to MRT
-- Best value picks
+- Amenities: parks and schools nearby, walk score (0-100)
+- Best value picks (compare prices against the market median)
 - Patterns and insights
 """
 
-        resp = await llm.ainvoke(prompt)
+        resp = await get_llm().ainvoke(prompt)
         content = resp.content
 
-    state.messages.append(AIMessage(content=content))
-    return state
+    return {"messages": [AIMessage(content=content)]}
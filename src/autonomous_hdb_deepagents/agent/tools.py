@@ -1,16 +1,129 @@
 import os
+import time
+import json
+import asyncio
 from toolbox_langchain import ToolboxClient
+from autonomous_hdb_deepagents.agent import metrics
+from autonomous_hdb_deepagents.agent.cache import SingleFlight
+from autonomous_hdb_deepagents.agent.metrics import InstrumentedTool
 
-_toolbox_client = None
+TOOLS_TTL_SECONDS = float(os.getenv("TOOLS_TTL_SECONDS", "300"))
+TOOLS_FILE = os.getenv("TOOLS_FILE", "tools.yaml")
+# "toolbox" (default, MCP-compatible) or "asyncpg" (in-process, see pg_backend.py)
+TOOLS_BACKEND = os.getenv("TOOLS_BACKEND", "toolbox")
+# Share one in-flight call between concurrent identical tool invocations
+TOOLS_SINGLEFLIGHT = os.getenv("TOOLS_SINGLEFLIGHT", "1") == "1"
 
-async def load_tools():
-    global _toolbox_client
+tool_flight = metrics.registry.track_singleflight(SingleFlight("tool"))
+
+
+class CoalescedTool:
+    """Wraps a tool so identical concurrent ainvoke calls run once."""
+
+    def __init__(self, tool, flight: SingleFlight = tool_flight):
+        self._tool = tool
+        self._flight = flight
+        self.name = tool.name
+
+    def __getattr__(self, item):
+        return getattr(self._tool, item)
+
+    async def ainvoke(self, *args, **kwargs):
+        if len(args) != 1 or kwargs or not isinstance(args[0], dict):
+            return await self._tool.ainvoke(*args, **kwargs)
+        key = (self.name, json.dumps(args[0], sort_keys=True, default=str))
+        return await self._flight.do(key, self._tool.ainvoke, args[0])
+
+
+class ToolRegistry:
+    """
+    Process-wide cache of the Toolbox toolset.
+
+    The manifest is loaded once and reused by every pipeline node. It is
+    refreshed when the TTL expires or when tools.yaml changes on disk.
+    """
+
+    def __init__(self, url: str, ttl: float = TOOLS_TTL_SECONDS, tools_file: str = TOOLS_FILE,
+                 backend: str = TOOLS_BACKEND):
+        self.url = url
+        self.backend = backend
+        self.ttl = ttl
+        self.tools_file = tools_file
+        self._client = None
+        self._tools = None
+        self._loaded_at = 0.0
+        self._file_mtime = None
+        self._lock = asyncio.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            if self.backend == "asyncpg":
+                from autonomous_hdb_deepagents.agent.pg_backend import PgToolClient
+                print(f"[MCP] Running {self.tools_file} statements in-process via asyncpg")
+                self._client = PgToolClient(tools_file=self.tools_file)
+            else:
+                print(f"[MCP] Connecting to Toolbox at: {self.url}")
+                self._client = ToolboxClient(self.url)
+        return self._client
 
-    if _toolbox_client is None:
-        toolbox_url  = os.getenv("TOOLBOX_URL", "http://localhost:5000")
-        print(f"[MCP] Connecting to Toolbox at: {toolbox_url}")
-        _toolbox_client = ToolboxClient(toolbox_url)
+    async def close(self):
+        close = getattr(self._client, "close", None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
 
-    tools = await _toolbox_client.aload_toolset()
-    print("[MCP] Loaded tools:", [t.name for t in tools])
-    return {t.name: t for t in tools}
\ No newline at end of file
+    def _current_mtime(self):
+        try:
+            return os.path.getmtime(self.tools_file)
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        if self._tools is None:
+            return True
+        if self.ttl > 0 and time.monotonic() - self._loaded_at > self.ttl:
+            return True
+        return self._current_mtime() != self._file_mtime
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+        self._tools = None
+
+    async def get(self) -> dict:
+        if not self.is_stale():
+            return self._tools
+
+        async with self._lock:
+            # Another coroutine may have refreshed while we waited
+            if not self.is_stale():
+                return self._tools
+
+            mtime = self._current_mtime()
+            try:
+                tools = await self._get_client().aload_toolset()
+            except Exception as e:
+                if self._tools is None:
+                    raise
+                # Keep serving the last good toolset; retry after the next TTL
+                print(f"[MCP] Refresh failed, keeping cached tools: {e}")
+                self._loaded_at = time.monotonic()
+                self._file_mtime = mtime
+                return self._tools
+
+            # Wrapped so every call is timed (and traced when OTel is on);
+            # coalescing sits outside so a shared call is timed once
+            self._tools = {t.name: InstrumentedTool(t) for t in tools}
+            if TOOLS_SINGLEFLIGHT:
+                self._tools = {name: CoalescedTool(t) for name, t in self._tools.items()}
+            self._loaded_at = time.monotonic()
+            self._file_mtime = mtime
+            print("[MCP] Loaded tools:", list(self._tools))
+            return self._tools
+
+
+registry = ToolRegistry(os.getenv("TOOLBOX_URL", "http://localhost:5000"))
+
+
+async def load_tools():
+    return await registry.get()
@@ -1,14 +1,40 @@
 import sys, os
 sys.path.append(os.path.abspath("src"))
 
-from fastapi import FastAPI
+import json
+from typing import Optional
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from autonomous_hdb_deepagents.agent.cli import run_cli
+from autonomous_hdb_deepagents.agent.cli import run_query
+from autonomous_hdb_deepagents.agent.resale import decode_cursor
+from autonomous_hdb_deepagents.agent.stream import stream_query
+from autonomous_hdb_deepagents.agent.spatial_index import get_mrt_index
+from autonomous_hdb_deepagents.agent import metrics
+from autonomous_hdb_deepagents.agent.tools import registry
 
-app = FastAPI(title="HDB DeepAgent API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the in-process MRT exit index before the first request
+    get_mrt_index()
+    yield
+    await registry.close()
+
+app = FastAPI(title="HDB DeepAgent API", lifespan=lifespan)
 
 class QueryRequest(BaseModel):
     query: str
+    # True = run the pipeline directly, False = via DeepAgent, None = AGENT_MODE
+    direct: Optional[bool] = None
+    # next_cursor from a previous response, to load the next page of flats
+    cursor: Optional[str] = None
+
+def check_cursor(req: QueryRequest):
+    try:
+        decode_cursor(req.cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/health")
 def health():
@@ -16,5 +42,25 @@ def health():
 
 @app.post("/query")
 async def query(req: QueryRequest):
-    response = await run_cli(req.query)
-    return {"response": response}
+    """{"response", "next_cursor"}; next_cursor is null when there are no more flats."""
+    check_cursor(req)
+    return await run_query(req.query, direct=req.direct, cursor=req.cursor, paged=True)
+
+@app.post("/query/stream")
+async def query_stream(req: QueryRequest):
+    """
+    Newline-delimited JSON: one event per line, pipeline stages first,
+    then summary tokens, then a final "done" event with the full response.
+    """
+    check_cursor(req)
+
+    async def body():
+        async for event in stream_query(req.query, cursor=req.cursor):
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition: node/tool/LLM latency, tokens, cache hits, row counts."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
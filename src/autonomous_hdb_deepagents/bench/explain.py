@@ -0,0 +1,211 @@
+"""
+EXPLAIN regression check for the SQL tools in tools.yaml.
+
+Plans each statement with sample parameters against a live database and
+fails if it sequentially scans a large table, skips its expected index, or
+exceeds a cost budget. Needs the `pg` extra and DATABASE_URL.
+
+    uv run -m autonomous_hdb_deepagents.bench.explain
+    uv run -m autonomous_hdb_deepagents.bench.explain --tool list-hdb-flats --analyze --generic
+
+--compare plans the legacy geom_4326 statements in tools_4326.yaml next to
+the current SVY21 ones and reports cost and, with --analyze, latency.
+
+    uv run -m autonomous_hdb_deepagents.bench.explain --compare --analyze
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from autonomous_hdb_deepagents.agent.pg_backend import DATABASE_URL, asyncpg, coerce, load_tool_specs
+
+# Sample parameters and plan expectations per tool
+CHECKS = {
+    "list-hdb-flats": {
+        "params": {"town": "TOA PAYOH", "max_price": 500000, "flat_type": "4 ROOM", "limit": 30},
+        "no_seq_scan": ["hdb_combined_resale_flat_prices", "hdb_property_info", "hdb_block_walkability"],
+        "indexes": ["hdb_resale_town_type_month_id_idx"],
+    },
+    "list-hdb-flats-near-mrt": {
+        # A prefix of TAMPINES EAST/WEST: only TAMPINES MRT STATION's exits may be scanned
+        "params": {"mrt_station": "TAMPINES", "radius": 400, "max_price": 600000, "flat_type": "4 ROOM", "limit": 30},
+        "no_seq_scan": ["hdb_combined_resale_flat_prices", "hdb_block_coords"],
+        "indexes": ["hdb_block_coords_geom_3414_idx", "hdb_resale_block_street_month_idx"],
+    },
+    "list-hdb-flats-within-radius": {
+        "params": {"town": "TAMPINES", "radius": 400, "max_price": 600000, "flat_type": "4 ROOM", "limit": 30},
+        "no_seq_scan": ["hdb_combined_resale_flat_prices", "hdb_block_nearest_mrt"],
+        "indexes": ["hdb_block_nearest_mrt_distance_idx", "hdb_resale_block_street_month_idx"],
+    },
+    "get-resale-stats": {
+        "params": {"town": "TOA PAYOH", "flat_type": "4 ROOM"},
+        "no_seq_scan": ["hdb_combined_resale_flat_prices"],
+        "indexes": [],
+    },
+    "amenities-batch": {
+        "params": {"lats": [1.3343, 1.3496], "lons": [103.8563, 103.7496], "park_radius": 500, "school_radius": 800},
+        "no_seq_scan": [],
+        "indexes": ["sg_parks_geom_3414_idx"],
+    },
+    "geospatial-query": {
+        "params": {"mode": "nearest_mrt", "lat": 1.3343, "lon": 103.8563, "radius": 500},
+        "no_seq_scan": ["mrt_exits"],
+        "indexes": ["idx_mrt_geom_3414"],
+    },
+    "nearest-mrt-batch": {
+        "params": {"lats": [1.3343, 1.3496], "lons": [103.8563, 103.7496]},
+        "no_seq_scan": ["mrt_exits"],
+        "indexes": [],
+    },
+}
+
+LEGACY_TOOLS_FILE = Path(__file__).with_name("tools_4326.yaml")
+# geom_4326 radii are in degrees; scaled so both variants search the same area
+METERS_PER_DEGREE = 111000.0
+
+# Parameter sets for --compare, with radii in metres
+COMPARE = {
+    "geospatial-query": [
+        {"mode": mode, "lat": 1.3343, "lon": 103.8563, "radius": 500}
+        for mode in ("nearest_mrt", "nearby_parks", "nearby_schools", "walkability_score")
+    ],
+}
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def check_plan(plan, check, max_cost=None):
+    """Return a list of failure messages for one plan (empty = pass)."""
+    failures = []
+    nodes = list(walk(plan))
+
+    for n in nodes:
+        if n.get("Node Type") == "Seq Scan" and n.get("Relation Name") in check["no_seq_scan"]:
+            failures.append(f"Seq Scan on {n['Relation Name']}")
+
+    used = {n.get("Index Name") for n in nodes if n.get("Index Name")}
+    for idx in check["indexes"]:
+        if idx not in used:
+            failures.append(f"index {idx} not used")
+
+    if max_cost is not None and plan.get("Total Cost", 0) > max_cost:
+        failures.append(f"cost {plan['Total Cost']:.0f} > {max_cost:.0f}")
+
+    return failures
+
+
+async def explain(conn, statement, args, analyze=False):
+    opts = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    raw = await conn.fetchval(f"EXPLAIN ({opts}) {statement}", *args)
+    doc = json.loads(raw) if isinstance(raw, str) else raw
+    return doc[0]
+
+
+async def timed(conn, statement, args, repeat):
+    """Median wall time in ms of running the statement, and its row count."""
+    times, rows = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = await conn.fetch(statement, *args)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), len(rows)
+
+
+async def compare(conn, specs, args):
+    legacy = load_tool_specs(args.compare_file)
+    for name in args.tool or list(COMPARE):
+        if name not in specs or name not in legacy or name not in COMPARE:
+            print(f"[COMPARE] {name}: no legacy statement or parameters, skipped")
+            continue
+
+        for params in COMPARE[name]:
+            cols = []
+            for label, spec, scale in (("4326", legacy[name], 1 / METERS_PER_DEGREE), ("3414", specs[name], 1)):
+                p = dict(params)
+                if p.get("radius") is not None:
+                    p["radius"] = p["radius"] * scale
+                values = [coerce(p.get(x["name"]), x) for x in spec["parameters"]]
+                plan = (await explain(conn, spec["statement"], values))["Plan"]
+                col = f"{label} cost={plan['Total Cost']:.0f}"
+                if args.analyze:
+                    ms, n = await timed(conn, spec["statement"], values, args.repeat)
+                    col += f" {ms:.2f} ms rows={n}"
+                cols.append(col)
+            print(f"[COMPARE] {name} {params.get('mode', '')}: {' → '.join(cols)}")
+
+
+async def run(args):
+    specs = load_tool_specs(args.tools_file)
+    if args.compare:
+        conn = await asyncpg.connect(args.dsn)
+        try:
+            await compare(conn, specs, args)
+        finally:
+            await conn.close()
+        return 0
+
+    names = args.tool or list(CHECKS)
+
+    conn = await asyncpg.connect(args.dsn)
+    failed = 0
+    try:
+        if args.generic:
+            # What a reused prepared statement (Toolbox, asyncpg cache) ends up running
+            await conn.execute("SET plan_cache_mode = force_generic_plan")
+
+        for name in names:
+            spec, check = specs.get(name), CHECKS.get(name)
+            if spec is None or check is None:
+                print(f"[EXPLAIN] {name}: no statement or no check defined, skipped")
+                continue
+
+            params = [coerce(check["params"].get(p["name"]), p) for p in spec["parameters"]]
+            result = await explain(conn, spec["statement"], params, args.analyze)
+            plan = result["Plan"]
+            failures = check_plan(plan, check, args.max_cost)
+            failed += bool(failures)
+
+            scans = sorted({
+                f"{n['Node Type']}({n.get('Index Name') or n.get('Relation Name')})"
+                for n in walk(plan) if "Scan" in n.get("Node Type", "")
+            })
+            timing = f", {result['Execution Time']:.1f} ms" if "Execution Time" in result else ""
+            status = "FAIL" if failures else "ok"
+            print(f"[EXPLAIN] {name}: {status} cost={plan['Total Cost']:.0f}{timing}")
+            print(f"          scans: {', '.join(scans)}")
+            for f in failures:
+                print(f"          ✗ {f}")
+    finally:
+        await conn.close()
+
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--dsn", default=DATABASE_URL)
+    p.add_argument("--tools-file", default="tools.yaml")
+    p.add_argument("--tool", action="append", help="Only check this tool (repeatable)")
+    p.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (executes the query)")
+    p.add_argument("--generic", action="store_true", help="Check the generic plan of a prepared statement")
+    p.add_argument("--max-cost", type=float, help="Fail plans whose total cost exceeds this")
+    p.add_argument("--compare", action="store_true", help="Compare against the legacy geom_4326 statements")
+    p.add_argument("--compare-file", default=str(LEGACY_TOOLS_FILE))
+    p.add_argument("--repeat", type=int, default=20, help="Timed runs per statement with --compare --analyze")
+    args = p.parse_args(argv)
+
+    if asyncpg is None:
+        print("[EXPLAIN] Needs asyncpg and pyyaml: pip install 'autonomous-hdb-deepagents[pg]'", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
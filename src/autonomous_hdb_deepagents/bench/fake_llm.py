@@ -0,0 +1,114 @@
+import re
+import json
+import zlib
+import asyncio
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from autonomous_hdb_deepagents.agent.intent_rules import parse_intent
+
+_QUERY_RE = re.compile(r'User query: "(.*)"', re.S)
+_PRICE_RE = re.compile(r'"price": "\$([\d,]+)(?:\.\d+)?"')
+_MEDIAN_RE = re.compile(r"\((\d+) sales\): median (\$\d[\d,]*\d)")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for the OpenRouter model.
+
+    Recognises the pipeline's intent and summary prompts, and plays the
+    DeepAgent's routing role when tools are bound: the first turn calls the
+    `task` tool with the orchestrator, the next turn returns its result.
+    `latency` is paid once per call, `token_latency` per streamed token.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bench"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(t, "name", None) or t.get("name") or t.get("function", {}).get("name") for t in tools]
+        return self.bind(tool_names=names, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tool_names=None) -> AIMessage:
+        last = messages[-1]
+
+        if tool_names:
+            if isinstance(last, ToolMessage):
+                return AIMessage(content=str(last.content))
+            query = str(last.content)
+            return AIMessage(content="", tool_calls=[{
+                "name": "task",
+                "args": {"description": query, "subagent_type": "orchestrator"},
+                "id": f"call_{zlib.crc32(query.encode())}",
+            }])
+
+        prompt = str(last.content)
+        m = _QUERY_RE.search(prompt)
+        if "Extract user intent" in prompt and m:
+            intent, _ = parse_intent(m.group(1))
+            return AIMessage(content=json.dumps(intent))
+
+        prices = [int(p.replace(",", "")) for p in _PRICE_RE.findall(prompt)]
+        if prices:
+            text = (
+                f"### Summary\n\n- Price range: ${min(prices):,} to ${max(prices):,}\n"
+                f"- {len(prices)} flats previewed; the cheapest is the best value pick.\n"
+                "- Flats closer to MRT exits command a modest premium."
+            )
+            market = _MEDIAN_RE.search(prompt)
+            if market:
+                text += f"\n- Market median {market.group(2)} over {market.group(1)} recent sales."
+        else:
+            text = "No flats found matching your criteria."
+        return AIMessage(content=text)
+
+    def _usage(self, messages, content):
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        completion_tokens = len(str(content).split())
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _generate(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs: Any) -> ChatResult:
+        msg = self._respond(messages, tool_names)
+        msg.usage_metadata = self._usage(messages, msg.content)
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._generate(messages, stop, None, tool_names)
+
+    async def _astream(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs: Any):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        msg = self._respond(messages, tool_names)
+
+        if msg.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                    for i, tc in enumerate(msg.tool_calls)
+                ],
+            ))
+            return
+
+        for token in re.findall(r"\S+\s*", msg.content):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", usage_metadata=self._usage(messages, msg.content)
+        ))
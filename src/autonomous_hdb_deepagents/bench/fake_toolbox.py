@@ -0,0 +1,375 @@
+import csv
+import json
+import zlib
+import asyncio
+from pathlib import Path
+from autonomous_hdb_deepagents.agent.spatial_index import DATA_DIR, SpatialGrid, parse_point, svy21
+from autonomous_hdb_deepagents.agent.mrt_resolver import TOWN_CODE_MAP
+
+# Spread of synthetic block coordinates around their anchor MRT exit
+BLOCK_JITTER_DEGREES = 0.006
+
+
+class FakeTool:
+    def __init__(self, name, fn, latency=0.0):
+        self.name = name
+        self._fn = fn
+        self.latency = latency
+        self.calls = 0
+
+    async def ainvoke(self, params):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return json.dumps(self._fn(params or {}), default=str)
+
+
+class FakeToolboxClient:
+    """
+    In-memory stand-in for ToolboxClient backed by the CSVs in db/init/data.
+
+    hdb_property_info is not shipped with the repo, so block coordinates are
+    synthesised deterministically around MRT exits of stations serving the
+    block's town. Every tool call pays `latency` seconds.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, latency=0.0, manifest_latency=0.0):
+        self.data_dir = Path(data_dir)
+        self.latency = latency
+        self.manifest_latency = manifest_latency
+        self._load()
+        self.tools = [
+            FakeTool("list-hdb-flats", self.list_hdb_flats, latency),
+            FakeTool("list-hdb-flats-near-mrt", self.list_hdb_flats_near_mrt, latency),
+            FakeTool("list-hdb-flats-within-radius", self.list_hdb_flats_within_radius, latency),
+            FakeTool("get-mrt-towns", self.get_mrt_towns, latency),
+            FakeTool("geospatial-query", self.geospatial_query, latency),
+            FakeTool("nearest-mrt-batch", self.nearest_mrt_batch, latency),
+            FakeTool("amenities-batch", self.amenities_batch, latency),
+            FakeTool("get-data-version", lambda p: [{"version": 1}], latency),
+            FakeTool("get-resale-stats", self.get_resale_stats, latency),
+        ]
+
+    def _rows(self, name):
+        path = self.data_dir / name
+        if not path.exists():
+            return []
+        with open(path, newline="", encoding="utf-8") as fh:
+            return list(csv.DictReader(fh))
+
+    def _grid(self, rows, label):
+        points = []
+        for r in rows:
+            xy = parse_point(r.get("geom_3414"))
+            if xy:
+                points.append((xy[0], xy[1], r[label]))
+        return SpatialGrid(points)
+
+    def _load(self):
+        exits = self._rows("mrt_exits.csv")
+        self.exit_points = [
+            (r["station_name"].upper(), *parse_point(r["geom_3414"])) for r in exits if parse_point(r.get("geom_3414"))
+        ]
+        self.mrt_towns = self._rows("mrt_to_hdb_town.csv")
+        self.exit_grid = SpatialGrid([
+            (*parse_point(r["geom_3414"]), r) for r in exits if parse_point(r.get("geom_3414"))
+        ])
+        self.park_grid = self._grid(self._rows("sg_parks.csv"), "name")
+        self.school_grid = self._grid(self._rows("sg_schools.csv"), "school_name")
+
+        # Town code → exits of the stations closest to that town
+        exits_by_station = {}
+        for r in exits:
+            exits_by_station.setdefault(r["station_name"], []).append((float(r["lat"]), float(r["lon"])))
+        self.town_anchors = {}
+        for r in self.mrt_towns:
+            if float(r["min_dist_m"] or 0) <= 500:
+                self.town_anchors.setdefault(r["town"], []).extend(exits_by_station.get(r["station_name"], []))
+
+        self.town_names = {v: k for k, v in TOWN_CODE_MAP.items()}
+
+        # (town, flat_type key) → rows, most recent first. ids follow load
+        # order, like the identity column
+        self.resale = {}
+        next_id = 1
+        for path in sorted(self.data_dir.glob("resale_flat_price_*.csv")):
+            with open(path, newline="", encoding="utf-8") as fh:
+                for r in csv.DictReader(fh):
+                    r["id"] = next_id
+                    next_id += 1
+                    key = (r["town"], r["flat_type"].replace(" ", "").lower())
+                    self.resale.setdefault(key, []).append(r)
+        for rows in self.resale.values():
+            rows.sort(key=lambda r: (r["month"], r["id"]), reverse=True)
+        self._block_grid = None
+
+        self.stats = self._recent_stats()
+
+    def _recent_stats(self):
+        """Trailing-12-month stats per (town, flat_type key), like hdb_resale_stats_recent."""
+        to_month = max((rows[0]["month"] for rows in self.resale.values() if rows), default=None)
+        if to_month is None:
+            return {}
+        y, m = map(int, to_month.split("-"))
+        y, m = (y, m - 11) if m > 11 else (y - 1, m + 1)
+        from_month = f"{y:04d}-{m:02d}"
+
+        def pct(values, q):
+            k = (len(values) - 1) * q
+            lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+            return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+        stats = {}
+        for (town, ft), rows in self.resale.items():
+            recent = [r for r in rows if r["month"] >= from_month]
+            if not recent:
+                continue
+            prices = sorted(float(r["resale_price"]) for r in recent)
+            psm = sorted(float(r["resale_price"]) / float(r["floor_area_sqm"])
+                         for r in recent if float(r["floor_area_sqm"] or 0))
+            stats[(town, ft)] = {
+                "town": town,
+                "flat_type": recent[0]["flat_type"],
+                "from_month": from_month,
+                "to_month": to_month,
+                "txn_count": len(prices),
+                "min_price": prices[0],
+                "p25_price": pct(prices, 0.25),
+                "median_price": pct(prices, 0.5),
+                "p75_price": pct(prices, 0.75),
+                "max_price": prices[-1],
+                "median_price_psm": pct(psm, 0.5) if psm else None,
+            }
+        return stats
+
+    def block_coords(self, town, block, street):
+        anchors = self.town_anchors.get(self.town_names.get(town))
+        if not anchors:
+            return None, None
+        h = zlib.crc32(f"{block}|{street}".encode())
+        lat, lon = anchors[h % len(anchors)]
+        jitter = BLOCK_JITTER_DEGREES
+        return (
+            lat + ((h >> 8) % 1000 / 1000 - 0.5) * jitter,
+            lon + ((h >> 18) % 1000 / 1000 - 0.5) * jitter,
+        )
+
+    def block_grid(self):
+        """SVY21 grid of synthetic block coordinates → that block's sales by flat type, newest first."""
+        if self._block_grid is None:
+            # (town, block, street) → {flat_type key: rows}; "" holds every type
+            blocks = {}
+            for (_, ft), rows in self.resale.items():
+                for r in rows:
+                    by_type = blocks.setdefault((r["town"], r["block"], r["street_name"]), {})
+                    by_type.setdefault(ft, []).append(r)
+                    by_type.setdefault("", []).append(r)
+            points = []
+            for (town, block, street), by_type in blocks.items():
+                lat, lon = self.block_coords(town, block, street)
+                if lat is not None:
+                    by_type[""].sort(key=lambda r: r["month"], reverse=True)
+                    points.append((*svy21(lat, lon), (lat, lon, by_type)))
+            self._block_grid = SpatialGrid(points)
+        return self._block_grid
+
+    async def aload_toolset(self):
+        if self.manifest_latency:
+            await asyncio.sleep(self.manifest_latency)
+        return self.tools
+
+    # -----------------------------------------------------
+    # Tool implementations (same row shapes as tools.yaml)
+    # -----------------------------------------------------
+    def list_hdb_flats(self, p):
+        town = (p.get("town") or "").upper()
+        max_price = p.get("max_price")
+        ft = (p.get("flat_type") or "").replace(" ", "").lower()
+        limit = p.get("limit") or 30
+        after = (p["after_month"], p.get("after_id") or 0) if p.get("after_month") else None
+
+        out = []
+        for (t, f), rows in self.resale.items():
+            if t != town or (ft and f != ft):
+                continue
+            for r in rows:
+                if max_price is not None and float(r["resale_price"]) > max_price:
+                    continue
+                if after is None or (r["month"], r["id"]) < after:
+                    out.append(r)
+        out.sort(key=lambda r: (r["month"], r["id"]), reverse=True)
+
+        flats = []
+        for r in out[:limit]:
+            lat, lon = self.block_coords(r["town"], r["block"], r["street_name"])
+            flats.append({
+                "id": r["id"],
+                "month": r["month"],
+                "town": r["town"],
+                "block": r["block"],
+                "street_name": r["street_name"],
+                "flat_type": r["flat_type"],
+                "resale_price": float(r["resale_price"]),
+                "lat": lat,
+                "lon": lon,
+            })
+        return flats
+
+    def list_hdb_flats_near_mrt(self, p):
+        q = (p.get("mrt_station") or "").upper()
+        names = {f"{q} MRT STATION", f"{q} LRT STATION"}
+        radius = float(p.get("radius") or 800)
+        max_price = p.get("max_price")
+        ft = (p.get("flat_type") or "").replace(" ", "").lower()
+        limit = p.get("limit") or 30
+
+        # Block → distance to the closest matching exit
+        grid = self.block_grid()
+        near = {}
+        for station, x, y in self.exit_points:
+            if station not in names:
+                continue
+            for d, block in grid.within(x, y, radius):
+                if d < near.get(id(block), (float("inf"),))[0]:
+                    near[id(block)] = (d, block)
+
+        out = []
+        for d, (lat, lon, by_type) in near.values():
+            for r in by_type.get(ft, ()):
+                if max_price is not None and float(r["resale_price"]) > max_price:
+                    continue
+                out.append((d, r, lat, lon))
+                break
+        out.sort(key=lambda o: o[0])
+
+        return [
+            {
+                "town": r["town"],
+                "block": r["block"],
+                "street_name": r["street_name"],
+                "flat_type": r["flat_type"],
+                "resale_price": float(r["resale_price"]),
+                "lat": lat,
+                "lon": lon,
+                "station_dist_m": d,
+            }
+            for d, r, lat, lon in out[:limit]
+        ]
+
+    def list_hdb_flats_within_radius(self, p):
+        town = (p.get("town") or "").upper()
+        radius = float(p.get("radius") or 400)
+        max_price = p.get("max_price")
+        ft = (p.get("flat_type") or "").replace(" ", "").lower()
+        limit = p.get("limit") or 30
+
+        # Latest matching sale per block of the town
+        latest = {}
+        for (t, f), rows in self.resale.items():
+            if t != town or (ft and f != ft):
+                continue
+            for r in rows:
+                if max_price is not None and float(r["resale_price"]) > max_price:
+                    continue
+                key = (r["block"], r["street_name"])
+                if key not in latest or r["month"] > latest[key]["month"]:
+                    latest[key] = r
+
+        out = []
+        for r in latest.values():
+            lat, lon = self.block_coords(r["town"], r["block"], r["street_name"])
+            if lat is None:
+                continue
+            hit = self.exit_grid.nearest(*svy21(lat, lon))
+            if hit is None or hit[0] > radius:
+                continue
+            d, e = hit
+            out.append({
+                "town": r["town"],
+                "block": r["block"],
+                "street_name": r["street_name"],
+                "flat_type": r["flat_type"],
+                "resale_price": float(r["resale_price"]),
+                "lat": lat,
+                "lon": lon,
+                "nearest_mrt": e["station_name"],
+                "nearest_exit": e["exit_code"],
+                "mrt_dist_m": d,
+                "station_dist_m": d,
+            })
+        out.sort(key=lambda o: o["station_dist_m"])
+        return out[:limit]
+
+    def get_resale_stats(self, p):
+        town = (p.get("town") or "").upper()
+        ft = (p.get("flat_type") or "").replace(" ", "").lower()
+        return [s for (t, f), s in sorted(self.stats.items()) if t == town and (not ft or f == ft)]
+
+    def get_mrt_towns(self, p):
+        q = (p.get("mrt_station") or "").upper()
+        names = {f"{q} MRT STATION", f"{q} LRT STATION"}
+        rows = [r for r in self.mrt_towns if r["station_name"].upper() in names]
+        rows.sort(key=lambda r: float(r["min_dist_m"] or 0))
+        return [
+            {
+                "station_name": r["station_name"],
+                "town": r["town"],
+                "num_blocks": int(r["num_blocks"]),
+                "min_dist_m": float(r["min_dist_m"]),
+            }
+            for r in rows[:5]
+        ]
+
+    def geospatial_query(self, p):
+        mode = p.get("mode")
+        x, y = svy21(p["lat"], p["lon"])
+        radius = float(p.get("radius") or 500)
+
+        if mode == "nearest_mrt":
+            hit = self.exit_grid.nearest(x, y)
+            if hit is None:
+                return []
+            d, e = hit
+            return [{"qtype": mode, "label": e["station_name"], "info": f"Exit: {e['exit_code']}",
+                     "metric": None, "dist_m": d}]
+        if mode in ("nearby_parks", "nearby_schools"):
+            grid = self.park_grid if mode == "nearby_parks" else self.school_grid
+            return [{"qtype": mode, "label": name, "info": None, "metric": None, "dist_m": d}
+                    for d, name in grid.within(x, y, radius)[:50]]
+        if mode == "walkability_score":
+            score = (
+                (50 if self.exit_grid.within(x, y, 400) else 0)
+                + min(len(self.school_grid.within(x, y, 800)), 5) * 5
+                + min(len(self.park_grid.within(x, y, 500)), 5) * 5
+            )
+            return [{"qtype": mode, "label": "Walk Score", "info": "Amenities Proximity",
+                     "metric": float(score), "dist_m": 0.0}]
+        return []
+
+    def nearest_mrt_batch(self, p):
+        out = []
+        for i, (lat, lon) in enumerate(zip(p.get("lats") or [], p.get("lons") or []), start=1):
+            hit = self.exit_grid.nearest(*svy21(lat, lon))
+            if hit:
+                d, e = hit
+                out.append({"idx": i, "label": e["station_name"], "info": f"Exit: {e['exit_code']}", "dist_m": d})
+        return out
+
+    def amenities_batch(self, p):
+        park_radius = float(p.get("park_radius") or 500)
+        school_radius = float(p.get("school_radius") or 800)
+        out = []
+        for i, (lat, lon) in enumerate(zip(p.get("lats") or [], p.get("lons") or []), start=1):
+            x, y = svy21(lat, lon)
+            park = self.park_grid.nearest(x, y)
+            school = self.school_grid.nearest(x, y)
+            out.append({
+                "idx": i,
+                "nearest_park": park[1] if park else None,
+                "park_dist_m": park[0] if park else None,
+                "parks_nearby": self.park_grid.count_within(x, y, park_radius),
+                "nearest_school": school[1] if school else None,
+                "school_dist_m": school[0] if school else None,
+                "schools_nearby": self.school_grid.count_within(x, y, school_radius),
+            })
+        return out
@@ -0,0 +1,91 @@
+"""
+Local stand-in for the OneMap search API, for exercising ingest.geocode.
+
+Returns deterministic coordinates inside Singapore for any 6-digit postal
+code, with optional latency and a share of 429 responses to test backoff.
+
+    uv run -m autonomous_hdb_deepagents.bench.onemap_stub --port 8765 --latency 0.05 --fail-rate 0.1
+    ONEMAP_BASE_URL=http://127.0.0.1:8765 uv run -m autonomous_hdb_deepagents.ingest.geocode \
+        --postal-file postals.txt --dry-run --rate 200
+"""
+import json
+import time
+import random
+import argparse
+import zlib
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_result(postal):
+    h = zlib.crc32(postal.encode())
+    lat = 1.28 + (h % 1000) / 1000 * 0.15
+    lon = 103.70 + (h // 1000 % 1000) / 1000 * 0.25
+    # Rough SVY21 (EPSG:3414) around Singapore
+    x = 28001.642 + (lon - 103.833333) * 111_320 * 0.99985
+    y = 38744.572 + (lat - 1.366667) * 110_574
+    blk = str(h % 900 + 1)
+    road = "TOA PAYOH LORONG " + str(h % 8 + 1)
+    return {
+        "SEARCHVAL": f"{blk} {road}",
+        "BLK_NO": blk,
+        "ROAD_NAME": road,
+        "BUILDING": "HDB-TOA PAYOH",
+        "ADDRESS": f"{blk} {road} SINGAPORE {postal}",
+        "POSTAL": postal,
+        "X": f"{x:.6f}",
+        "Y": f"{y:.6f}",
+        "LATITUDE": f"{lat:.9f}",
+        "LONGITUDE": f"{lon:.9f}",
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/api/common/elastic/search":
+            return self._send(404, {"error": "not found"})
+
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            return self._send(429, {"error": "Too many requests"})
+
+        q = (parse_qs(url.query).get("searchVal") or [""])[0].strip()
+        results = [fake_result(q)] if q.isdigit() and len(q) == 6 else []
+        self._send(200, {"found": len(results), "totalNumPages": 1, "pageNum": 1, "results": results})
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    args = p.parse_args(argv)
+
+    Handler.latency = args.latency
+    Handler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"[STUB] OneMap stub on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Offline benchmark for the HDB pipeline and DeepAgent.
+
+Runs end-to-end against FakeChatModel and FakeToolboxClient, so it needs no
+OpenRouter key, Toolbox or PostGIS. The real LLM is only built on first use,
+so importing the pipeline without OPENROUTER_API_KEY is fine. Reports per-node latency, throughput at
+each concurrency level and per-query allocations.
+
+    uv run -m autonomous_hdb_deepagents.bench.run --concurrency 1,8,32
+    uv run -m autonomous_hdb_deepagents.bench.run --target deep --llm-latency 0.3 --max-p95-ms 2000
+"""
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tracemalloc
+import contextlib
+from collections import defaultdict
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import HumanMessage
+
+from autonomous_hdb_deepagents.agent import llm as llm_module, intent, resale, spatial_index, tools, metrics
+from autonomous_hdb_deepagents.agent.pipeline import compiled_orchestrator
+from autonomous_hdb_deepagents.agent.deep_agent import build_deep_agent
+from autonomous_hdb_deepagents.bench.fake_llm import FakeChatModel
+from autonomous_hdb_deepagents.bench.fake_toolbox import FakeToolboxClient
+
+DEFAULT_QUERIES = [
+    "Find flats near Bukit Batok MRT",
+    "Show me 4-room flats in Toa Payoh under 500k",
+    "Which flats are within 400m of an MRT in Tampines?",
+    "Find cheapest 5-room units near Punggol MRT",
+    "Best value flats near Woodlands MRT under 600k",
+    "Show 3-room flats in Bishan near MRT",
+    "Executive flats in Jurong West under $800,000",
+    "4 room flats near Clementi MRT within 800m",
+]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+class NodeTimer(AsyncCallbackHandler):
+    """Collects wall time per LangGraph node (any graph, including subgraphs)."""
+
+    def __init__(self):
+        self.starts = {}
+        self.samples = defaultdict(list)
+
+    async def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self.starts[run_id] = (node, time.perf_counter())
+
+    async def _finish(self, run_id):
+        start = self.starts.pop(run_id, None)
+        if start:
+            self.samples[start[0]].append(time.perf_counter() - start[1])
+
+    async def on_chain_end(self, outputs, *, run_id, **kwargs):
+        await self._finish(run_id)
+
+    async def on_chain_error(self, error, *, run_id, **kwargs):
+        await self._finish(run_id)
+
+    def report(self):
+        return {
+            node: {
+                "count": len(v),
+                "mean_ms": 1000 * sum(v) / len(v),
+                "p95_ms": 1000 * percentile(v, 0.95),
+            }
+            for node, v in sorted(self.samples.items())
+        }
+
+
+def install(args):
+    """Point the pipeline at the fake model and toolbox."""
+    llm = FakeChatModel(latency=args.llm_latency, token_latency=args.token_latency)
+    llm_module.set_llm(llm)
+
+    tools.registry._client = FakeToolboxClient(latency=args.tool_latency)
+    tools.registry.invalidate()
+
+    if not args.mrt_index:
+        spatial_index._mrt_index = None
+        spatial_index._mrt_index_loaded = True
+
+    if args.cold:
+        intent.intent_cache.maxsize = 0
+        resale.flats_cache.maxsize = 0
+
+    return llm
+
+
+def reset_caches():
+    intent.intent_cache.clear()
+    resale.invalidate_flats_cache()
+
+
+async def invoke(runnable, query, callbacks=()):
+    return await runnable.ainvoke(
+        {"messages": [HumanMessage(content=query)]},
+        # Include the production metrics handler so its overhead is measured too
+        config={"callbacks": [metrics.callback_handler, *callbacks]},
+    )
+
+
+async def run_level(runnable, queries, concurrency, timer):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(q):
+        nonlocal errors
+        async with sem:
+            t = time.perf_counter()
+            try:
+                await invoke(runnable, q, [timer])
+            except Exception as e:
+                errors += 1
+                print(f"[BENCH] Query failed: {q!r}: {e}", file=sys.stderr)
+            latencies.append(time.perf_counter() - t)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    wall = time.perf_counter() - t0
+
+    return {
+        "concurrency": concurrency,
+        "queries": len(queries),
+        "errors": errors,
+        "wall_s": wall,
+        "qps": len(queries) / wall if wall else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 0.50),
+        "p95_ms": 1000 * percentile(latencies, 0.95),
+        "p99_ms": 1000 * percentile(latencies, 0.99),
+        "max_ms": 1000 * max(latencies, default=0.0),
+    }
+
+
+async def measure_allocations(runnable, queries):
+    """Sequential pass under tracemalloc: peak and retained bytes per query."""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for q in queries:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await invoke(runnable, q)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "queries": len(queries),
+        "mean_peak_kib": sum(peaks) / len(peaks) / 1024 if peaks else 0.0,
+        "max_peak_kib": max(peaks, default=0) / 1024,
+        "mean_retained_kib": sum(retained) / len(retained) / 1024 if retained else 0.0,
+    }
+
+
+async def bench_target(name, runnable, args):
+    queries = (args.queries_list * (args.queries // len(args.queries_list) + 1))[: args.queries]
+
+    # Warm-up: load the toolset and spatial index outside the measurements
+    await invoke(runnable, queries[0])
+
+    result = {"target": name, "levels": [], "nodes": {}, "allocations": None}
+    timer = NodeTimer()
+    for c in args.concurrency:
+        reset_caches()
+        result["levels"].append(await run_level(runnable, queries, c, timer))
+    result["nodes"] = timer.report()
+
+    if args.alloc:
+        reset_caches()
+        result["allocations"] = await measure_allocations(runnable, queries[: args.alloc])
+
+    return result
+
+
+def print_report(result):
+    print(f"\n=== {result['target']} ===")
+    print(f"{'conc':>5} {'qps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    for lv in result["levels"]:
+        print(
+            f"{lv['concurrency']:>5} {lv['qps']:>9.1f} {lv['p50_ms']:>9.1f} {lv['p95_ms']:>9.1f} "
+            f"{lv['p99_ms']:>9.1f} {lv['max_ms']:>9.1f} {lv['errors']:>7}"
+        )
+
+    print(f"\n{'node':<40} {'count':>6} {'mean ms':>9} {'p95 ms':>9}")
+    for node, s in result["nodes"].items():
+        print(f"{node:<40} {s['count']:>6} {s['mean_ms']:>9.2f} {s['p95_ms']:>9.2f}")
+
+    a = result["allocations"]
+    if a:
+        print(
+            f"\nallocations over {a['queries']} queries: mean peak {a['mean_peak_kib']:.1f} KiB, "
+            f"max peak {a['max_peak_kib']:.1f} KiB, mean retained {a['mean_retained_kib']:.1f} KiB"
+        )
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--target", choices=["pipeline", "deep", "both"], default="both")
+    p.add_argument("--queries", type=int, default=32, help="Queries per concurrency level")
+    p.add_argument("--queries-file", help="File with one query per line (default: built-in samples)")
+    p.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    p.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per fake LLM call")
+    p.add_argument("--token-latency", type=float, default=0.0, help="Seconds per streamed token")
+    p.add_argument("--tool-latency", type=float, default=0.0, help="Seconds per fake tool call")
+    p.add_argument("--alloc", type=int, default=8, help="Queries in the tracemalloc pass (0 = skip)")
+    p.add_argument("--cold", action="store_true", help="Disable intent and result caches")
+    p.add_argument("--no-mrt-index", dest="mrt_index", action="store_false",
+                   help="Enrich through the (fake) database tools instead of the in-process index")
+    p.add_argument("--json", help="Write results as JSON to this path")
+    p.add_argument("--max-p95-ms", type=float, help="Exit 1 if any level's p95 exceeds this")
+    p.add_argument("--verbose", action="store_true", help="Show pipeline logs")
+    args = p.parse_args(argv)
+
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as fh:
+            args.queries_list = [line.strip() for line in fh if line.strip()]
+    else:
+        args.queries_list = DEFAULT_QUERIES
+    return args
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    llm = install(args)
+
+    targets = []
+    if args.target in ("pipeline", "both"):
+        targets.append(("pipeline", compiled_orchestrator))
+    if args.target in ("deep", "both"):
+        targets.append(("deep_agent", build_deep_agent(model=llm)))
+
+    results = []
+    for name, runnable in targets:
+        # Nodes print progress lines; keep them out of the report unless asked
+        sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            results.append(await bench_target(name, runnable, args))
+
+    for r in results:
+        print_report(r)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.max_p95_ms is not None:
+        worst = max(lv["p95_ms"] for r in results for lv in r["levels"])
+        if worst > args.max_p95_ms:
+            print(f"\n[BENCH] p95 {worst:.1f} ms exceeds budget {args.max_p95_ms:.1f} ms", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,243 @@
+"""
+Concurrent OneMap geocoder that fills public.geocode_cache.
+
+Package version of notebook/data-ingestion/onemap-geocoding-cache.ipynb.
+Requests run concurrently under a token-bucket rate limit, with retries and
+backoff. Results are upserted in batches, and postal codes already in the
+cache are skipped, so an interrupted run resumes where it stopped.
+
+    uv run -m autonomous_hdb_deepagents.ingest.geocode
+    uv run -m autonomous_hdb_deepagents.ingest.geocode --postal-file postals.txt --dry-run
+    ONEMAP_BASE_URL=http://127.0.0.1:8765 uv run -m autonomous_hdb_deepagents.ingest.geocode ...
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import httpx
+from autonomous_hdb_deepagents.agent.pg_backend import DATABASE_URL, asyncpg
+
+ONEMAP_BASE_URL = os.getenv("ONEMAP_BASE_URL", "https://www.onemap.gov.sg")
+ONEMAP_ACCESS_TOKEN = os.getenv("ONEMAP_ACCESS_TOKEN")
+# OneMap allows about 250 requests per minute
+GEOCODE_RATE = float(os.getenv("GEOCODE_RATE", "4"))
+GEOCODE_CONCURRENCY = int(os.getenv("GEOCODE_CONCURRENCY", "8"))
+GEOCODE_RETRIES = int(os.getenv("GEOCODE_RETRIES", "3"))
+GEOCODE_TIMEOUT = float(os.getenv("GEOCODE_TIMEOUT", "8"))
+GEOCODE_BATCH = int(os.getenv("GEOCODE_BATCH", "200"))
+
+SEARCH_PATH = "/api/common/elastic/search"
+
+POSTALS_SQL = """
+SELECT DISTINCT postal FROM (
+    SELECT postal_code AS postal FROM public.sg_schools WHERE postal_code IS NOT NULL
+    UNION
+    SELECT postal FROM public.hdb_property_info WHERE postal IS NOT NULL
+) AS all_postals
+WHERE postal ~ '^[0-9]{6}$'
+ORDER BY postal
+"""
+
+UPSERT_SQL = """
+INSERT INTO public.geocode_cache (
+    search_text, blk_no, road_name, building, address, postal,
+    lat, lon, x, y, geom_4326, geom_3414, canonical_street, updated_at
+)
+SELECT
+    r.search_text, r.blk_no, r.road_name, r.building, r.address, r.postal,
+    r.lat, r.lon, r.x, r.y,
+    ST_SetSRID(ST_Point(r.lon, r.lat), 4326),
+    ST_Transform(ST_SetSRID(ST_Point(r.lon, r.lat), 4326), 3414),
+    public.canonicalize_road_name(r.road_name),
+    now()
+FROM unnest(
+    $1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $6::text[],
+    $7::float8[], $8::float8[], $9::float8[], $10::float8[]
+) AS r(search_text, blk_no, road_name, building, address, postal, lat, lon, x, y)
+ON CONFLICT (search_text) DO UPDATE SET
+    blk_no = EXCLUDED.blk_no,
+    road_name = EXCLUDED.road_name,
+    building = EXCLUDED.building,
+    address = EXCLUDED.address,
+    postal = EXCLUDED.postal,
+    lat = EXCLUDED.lat,
+    lon = EXCLUDED.lon,
+    x = EXCLUDED.x,
+    y = EXCLUDED.y,
+    geom_4326 = EXCLUDED.geom_4326,
+    geom_3414 = EXCLUDED.geom_3414,
+    canonical_street = EXCLUDED.canonical_street,
+    updated_at = now()
+"""
+
+FIELDS = ("search_text", "blk_no", "road_name", "building", "address", "postal", "lat", "lon", "x", "y")
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def parse_result(search_text, r0):
+    return {
+        "search_text": search_text,
+        "blk_no": r0.get("BLK_NO"),
+        "road_name": r0.get("ROAD_NAME"),
+        "building": r0.get("BUILDING"),
+        "address": r0.get("ADDRESS"),
+        "postal": r0.get("POSTAL"),
+        "lat": float(r0["LATITUDE"]),
+        "lon": float(r0["LONGITUDE"]),
+        "x": float(r0["X"]),
+        "y": float(r0["Y"]),
+    }
+
+
+class OneMapGeocoder:
+    def __init__(self, client: httpx.AsyncClient, rate=GEOCODE_RATE, concurrency=GEOCODE_CONCURRENCY,
+                 retries=GEOCODE_RETRIES):
+        self.client = client
+        self.bucket = TokenBucket(rate, burst=max(1, int(rate)))
+        self.sem = asyncio.Semaphore(concurrency)
+        self.retries = retries
+        self.stats = {"ok": 0, "not_found": 0, "failed": 0, "retries": 0}
+
+    async def _search(self, text):
+        await self.bucket.acquire()
+        r = await self.client.get(SEARCH_PATH, params={
+            "searchVal": text, "returnGeom": "Y", "getAddrDetails": "Y", "pageNum": 1,
+        })
+        if r.status_code == 429 or r.status_code >= 500:
+            raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
+        r.raise_for_status()
+        return r.json().get("results") or []
+
+    async def geocode(self, text):
+        """Best match for a postal code or address; None if not found or failing."""
+        async with self.sem:
+            for attempt in range(self.retries + 1):
+                try:
+                    results = await self._search(text)
+                    break
+                except (httpx.TransportError, httpx.HTTPStatusError, ValueError) as e:
+                    if attempt == self.retries:
+                        print(f"[GEOCODE] {text} failed: {e}")
+                        self.stats["failed"] += 1
+                        return None
+                    self.stats["retries"] += 1
+                    # Exponential backoff with jitter
+                    await asyncio.sleep(0.5 * 2 ** attempt + random.random() * 0.25)
+
+        if not results:
+            self.stats["not_found"] += 1
+            return None
+        try:
+            row = parse_result(text, results[0])
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"[GEOCODE] {text} bad result: {e}")
+            self.stats["failed"] += 1
+            return None
+        self.stats["ok"] += 1
+        return row
+
+
+async def upsert_batch(conn, rows):
+    if rows:
+        await conn.execute(UPSERT_SQL, *[[r[f] for r in rows] for f in FIELDS])
+
+
+async def run(args):
+    conn = None if args.dry_run and args.postal_file else await asyncpg.connect(args.dsn)
+    try:
+        if args.postal_file:
+            with open(args.postal_file, encoding="utf-8") as fh:
+                postals = sorted({line.strip() for line in fh if line.strip()})
+        else:
+            postals = [r["postal"] for r in await conn.fetch(POSTALS_SQL)]
+
+        cached = set()
+        if conn is not None and not args.refresh:
+            cached = {r["search_text"].upper() for r in await conn.fetch("SELECT search_text FROM public.geocode_cache")}
+        todo = [p for p in postals if p.upper() not in cached]
+        if args.limit:
+            todo = todo[: args.limit]
+        print(f"[GEOCODE] {len(postals)} postal codes, {len(cached)} cached, {len(todo)} to geocode")
+
+        headers = {"User-Agent": "autonomous-hdb-deepagents"}
+        if ONEMAP_ACCESS_TOKEN:
+            headers["Authorization"] = ONEMAP_ACCESS_TOKEN
+
+        t0 = time.perf_counter()
+        async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=GEOCODE_TIMEOUT,
+                                     limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            geocoder = OneMapGeocoder(client, rate=args.rate, concurrency=args.concurrency)
+
+            # Upsert per batch: an interrupted run loses at most one batch
+            for i in range(0, len(todo), args.batch):
+                chunk = todo[i: i + args.batch]
+                rows = [r for r in await asyncio.gather(*(geocoder.geocode(p) for p in chunk)) if r]
+                if conn is not None and not args.dry_run:
+                    await upsert_batch(conn, rows)
+                done = i + len(chunk)
+                rate = done / (time.perf_counter() - t0)
+                print(f"[GEOCODE] {done}/{len(todo)} ({rate:.1f}/s) {geocoder.stats}")
+
+        if conn is not None and not args.dry_run and todo:
+            # School locations feed the per-block walkability scores
+            for fn in ("refresh_sg_school_geoms", "refresh_hdb_block_walkability"):
+                try:
+                    n = await conn.fetchval(f"SELECT public.{fn}()")
+                    print(f"[GEOCODE] {fn}() → {n} rows")
+                except asyncpg.UndefinedFunctionError:
+                    pass
+    finally:
+        if conn is not None:
+            await conn.close()
+
+    failed = geocoder.stats["failed"] if todo else 0
+    print(f"[GEOCODE] Done in {time.perf_counter() - t0:.1f}s; {failed} failed (re-run to retry)")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--dsn", default=DATABASE_URL)
+    p.add_argument("--base-url", default=ONEMAP_BASE_URL)
+    p.add_argument("--postal-file", help="One postal code per line (default: all postals in the database)")
+    p.add_argument("--rate", type=float, default=GEOCODE_RATE, help="Requests per second")
+    p.add_argument("--concurrency", type=int, default=GEOCODE_CONCURRENCY)
+    p.add_argument("--batch", type=int, default=GEOCODE_BATCH, help="Rows per upsert")
+    p.add_argument("--limit", type=int, help="Geocode at most this many")
+    p.add_argument("--refresh", action="store_true", help="Re-geocode postals that are already cached")
+    p.add_argument("--dry-run", action="store_true", help="Don't write to geocode_cache")
+    args = p.parse_args(argv)
+
+    if asyncpg is None and not (args.dry_run and args.postal_file):
+        print("[GEOCODE] Needs asyncpg: pip install 'autonomous-hdb-deepagents[ingest]'", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
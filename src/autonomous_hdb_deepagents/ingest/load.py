@@ -0,0 +1,239 @@
+"""
+Parallel, resumable bulk loader for the HDB database.
+
+Replaces the serial COPYs of db/init/01_load_data.sql for every reload after
+the first boot. Each file is loaded in its own transaction over a pool of
+connections. Files whose sha256 matches ingest_log are skipped, so an
+interrupted run can simply be re-run, and a new monthly resale CSV dropped
+into the data directory is appended on the next run.
+
+    uv run -m autonomous_hdb_deepagents.ingest.load                 # new/changed files only
+    uv run -m autonomous_hdb_deepagents.ingest.load --full          # reload everything
+    uv run -m autonomous_hdb_deepagents.ingest.load --file resale_flat_price_2025_06.csv
+"""
+import sys
+import time
+import hashlib
+import asyncio
+import argparse
+from pathlib import Path
+from autonomous_hdb_deepagents.agent.pg_backend import DATABASE_URL, asyncpg
+from autonomous_hdb_deepagents.agent.spatial_index import DATA_DIR
+from autonomous_hdb_deepagents.ingest.normalize import RESALE_COLUMNS, resale_records
+
+RESALE_TABLE = "hdb_combined_resale_flat_prices"
+RESALE_GLOB = "resale_flat_price_*.csv"
+
+# Reference tables are replaced wholesale; CSV columns match the table order
+REFERENCE_FILES = {
+    "sg_schools.csv": "sg_schools",
+    "sg_parks.csv": "sg_parks",
+    "hdb_property_info.csv": "hdb_property_info",
+    "mrt_exits.csv": "mrt_exits",
+    "mrt_to_hdb_town.csv": "mrt_to_hdb_town",
+}
+
+# Derived data to rebuild after a load: (function, tables it depends on)
+REFRESHES = [
+    ("refresh_hdb_block_coords", {"hdb_property_info"}),
+    ("refresh_hdb_block_nearest_mrt", {"hdb_property_info", "mrt_exits"}),
+    ("refresh_hdb_resale_stats", {RESALE_TABLE}),
+    ("refresh_sg_school_geoms", {"sg_schools"}),
+    ("refresh_hdb_block_walkability", {"hdb_property_info", "mrt_exits", "sg_parks", "sg_schools"}),
+]
+
+
+def file_sha256(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(chunk):
+            h.update(block)
+    return h.hexdigest()
+
+
+def plan_files(data_dir, only=None):
+    """[(path, table)] for every loadable file in data_dir."""
+    files = [(p, RESALE_TABLE) for p in sorted(data_dir.glob(RESALE_GLOB))]
+    files += [(data_dir / name, table) for name, table in REFERENCE_FILES.items() if (data_dir / name).exists()]
+    if only:
+        files = [(p, t) for p, t in files if p.name in only]
+    return files
+
+
+async def logged_hashes(conn):
+    rows = await conn.fetch("SELECT file_name, sha256 FROM public.ingest_log")
+    return {r["file_name"]: r["sha256"] for r in rows}
+
+
+async def log_file(conn, path, table, sha, rows):
+    await conn.execute(
+        """
+        INSERT INTO public.ingest_log (file_name, table_name, sha256, row_count, loaded_at)
+        VALUES ($1, $2, $3, $4, now())
+        ON CONFLICT (file_name) DO UPDATE
+            SET table_name = EXCLUDED.table_name, sha256 = EXCLUDED.sha256,
+                row_count = EXCLUDED.row_count, loaded_at = now()
+        """,
+        path.name, table, sha, rows,
+    )
+
+
+async def drop_indexes(conn, table):
+    """Drop secondary (non-constraint) indexes; returns their definitions."""
+    rows = await conn.fetch(
+        """
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = 'public' AND i.tablename = $1
+          AND NOT EXISTS (
+            SELECT 1 FROM pg_constraint c
+            WHERE c.conindid = format('public.%I', i.indexname)::regclass
+          )
+        """,
+        table,
+    )
+    for r in rows:
+        await conn.execute(f'DROP INDEX IF EXISTS public."{r["indexname"]}"')
+    return [r["indexdef"] for r in rows]
+
+
+async def load_file(pool, path, table, sha, full):
+    """Load one file atomically; returns the row count."""
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            if table == RESALE_TABLE:
+                # Replacing a file's rows keeps re-runs idempotent
+                if not full:
+                    await conn.execute(f"DELETE FROM public.{RESALE_TABLE} WHERE source_file = $1", path.name)
+                status = await conn.copy_records_to_table(
+                    RESALE_TABLE,
+                    records=resale_records(path, path.name),
+                    columns=RESALE_COLUMNS,
+                    schema_name="public",
+                )
+            else:
+                await conn.execute(f"TRUNCATE public.{table}")
+                status = await conn.copy_to_table(
+                    table, source=path, format="csv", header=True, schema_name="public"
+                )
+            rows = int(status.split()[-1])
+            await log_file(conn, path, table, sha, rows)
+    return rows
+
+
+async def refresh_derived(conn, changed):
+    for fn, deps in REFRESHES:
+        if not deps & changed:
+            continue
+        t = time.perf_counter()
+        try:
+            n = await conn.fetchval(f"SELECT public.{fn}()")
+            print(f"[INGEST] {fn}() → {n} rows in {time.perf_counter() - t:.1f}s")
+        except asyncpg.UndefinedFunctionError:
+            print(f"[INGEST] {fn}() not defined, skipped")
+
+    for table in sorted(changed):
+        await conn.execute(f"ANALYZE public.{table}")
+
+    version = await conn.fetchval("SELECT public.bump_data_version()")
+    print(f"[INGEST] Data version → {version}")
+
+
+async def run(args):
+    data_dir = Path(args.data_dir)
+    files = plan_files(data_dir, set(args.file or []))
+    if not files:
+        print(f"[INGEST] Nothing to load in {data_dir}")
+        return 0
+
+    pool = await asyncpg.create_pool(args.dsn, min_size=1, max_size=args.jobs)
+    t0 = time.perf_counter()
+    try:
+        async with pool.acquire() as conn:
+            logged = {} if args.full else await logged_hashes(conn)
+
+        todo = []
+        for path, table in files:
+            sha = file_sha256(path)
+            if logged.get(path.name) == sha:
+                print(f"[INGEST] {path.name} unchanged → skip")
+                continue
+            todo.append((path, table, sha))
+
+        if not todo:
+            print("[INGEST] Up to date")
+            return 0
+
+        changed = {table for _, table, _ in todo}
+        defer = args.full or args.defer_indexes
+        index_defs = []
+
+        async with pool.acquire() as conn:
+            if args.full:
+                # Forget the resale files with their rows: a file that then fails
+                # to load must not be skipped as unchanged on the next run.
+                # load_file logs each file again as it commits.
+                async with conn.transaction():
+                    await conn.execute(f"TRUNCATE public.{RESALE_TABLE}")
+                    await conn.execute("DELETE FROM public.ingest_log WHERE table_name = $1", RESALE_TABLE)
+            if defer:
+                for table in sorted(changed):
+                    index_defs += await drop_indexes(conn, table)
+                print(f"[INGEST] Deferred {len(index_defs)} indexes")
+
+        async def one(path, table, sha):
+            t = time.perf_counter()
+            rows = await load_file(pool, path, table, sha, args.full)
+            print(f"[INGEST] {path.name} → {table}: {rows} rows in {time.perf_counter() - t:.1f}s")
+
+        # The pool size bounds how many files load at once
+        results = await asyncio.gather(*(one(*item) for item in todo), return_exceptions=True)
+
+        # Rebuild even after a failed file, so the tables stay usable
+        if index_defs:
+            t = time.perf_counter()
+
+            async def build(ddl):
+                async with pool.acquire() as conn:
+                    await conn.execute(ddl)
+
+            await asyncio.gather(*(build(ddl) for ddl in index_defs))
+            print(f"[INGEST] Rebuilt {len(index_defs)} indexes in {time.perf_counter() - t:.1f}s")
+
+        failed = [(item[0].name, r) for item, r in zip(todo, results) if isinstance(r, Exception)]
+        for name, e in failed:
+            print(f"[INGEST] {name} failed: {e}")
+
+        async with pool.acquire() as conn:
+            await refresh_derived(conn, changed)
+    finally:
+        await pool.close()
+
+    if failed:
+        print(f"[INGEST] {len(failed)} file(s) failed; re-run to retry them")
+        return 1
+
+    print(f"[INGEST] Done in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--dsn", default=DATABASE_URL)
+    p.add_argument("--data-dir", default=str(DATA_DIR))
+    p.add_argument("--file", action="append", help="Only load this file name (repeatable)")
+    p.add_argument("--full", action="store_true", help="Truncate and reload every file, indexes rebuilt after")
+    p.add_argument("--defer-indexes", action="store_true", help="Drop and rebuild indexes around an incremental load")
+    p.add_argument("--jobs", type=int, default=4, help="Parallel connections")
+    args = p.parse_args(argv)
+
+    if args.full and args.file:
+        p.error("--full reloads every file and can't be combined with --file")
+    if asyncpg is None:
+        print("[INGEST] Needs asyncpg and pyyaml: pip install 'autonomous-hdb-deepagents[pg]'", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
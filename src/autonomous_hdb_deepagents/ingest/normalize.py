@@ -0,0 +1,100 @@
+import re
+import csv
+from decimal import Decimal
+
+# Column order written by the loader (generated columns are filled by Postgres)
+RESALE_COLUMNS = (
+    "month", "town", "flat_type", "block", "street_name", "storey_range",
+    "floor_area_sqm", "flat_model", "lease_commence_date", "remaining_lease",
+    "resale_price", "remaining_lease_months", "source_file",
+)
+
+HDB_LEASE_YEARS = 99
+
+_MONTH_RE = re.compile(r"^\s*(\d{4})-(\d{1,2})\s*$")
+_LEASE_RE = re.compile(r"(\d+)\s*years?(?:\s+(\d+)\s*months?)?", re.I)
+
+
+def parse_month(value):
+    """'2017-01' → (2017, 1). Raises ValueError on anything else."""
+    m = _MONTH_RE.match(value or "")
+    if not m or not 1 <= int(m.group(2)) <= 12:
+        raise ValueError(f"bad month {value!r}")
+    return int(m.group(1)), int(m.group(2))
+
+
+def remaining_lease_months(text, lease_commence, year, month):
+    """
+    Remaining lease in months at the time of sale.
+
+    Handles "61 years 04 months" (2017+), a bare year count (2015-2016), and
+    files without the column, where it is derived from the 99-year lease.
+    """
+    text = (text or "").strip()
+    if text.isdigit():
+        return int(text) * 12
+    m = _LEASE_RE.search(text)
+    if m:
+        return int(m.group(1)) * 12 + int(m.group(2) or 0)
+    if lease_commence:
+        return (lease_commence + HDB_LEASE_YEARS - year) * 12 - (month - 1)
+    return None
+
+
+def _int(v):
+    v = (v or "").strip()
+    return int(float(v)) if v else None
+
+
+def _float(v):
+    v = (v or "").strip()
+    return float(v) if v else None
+
+
+def _text(v):
+    v = (v or "").strip()
+    return v or None
+
+
+def _required(row, key):
+    v = _text(row.get(key))
+    if v is None:
+        raise ValueError(f"missing {key}")
+    return v
+
+
+def resale_record(row, source_file):
+    """One CSV row → typed tuple in RESALE_COLUMNS order. Raises ValueError for an unusable row."""
+    year, month = parse_month(row["month"])
+    lease_commence = _int(row.get("lease_commence_date"))
+    price = (row.get("resale_price") or "").strip()
+
+    return (
+        f"{year:04d}-{month:02d}",
+        _required(row, "town").upper(),
+        _required(row, "flat_type").upper(),
+        _text(row.get("block")),
+        _text(row.get("street_name")),
+        _text(row.get("storey_range")),
+        _float(row.get("floor_area_sqm")),
+        _text(row.get("flat_model")),
+        lease_commence,
+        _text(row.get("remaining_lease")),
+        Decimal(price) if price else None,
+        remaining_lease_months(row.get("remaining_lease"), lease_commence, year, month),
+        source_file,
+    )
+
+
+def resale_records(path, source_file):
+    """
+    Stream typed records from a resale CSV without loading it into memory.
+    Unusable rows are reported and skipped rather than failing the file.
+    """
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        for row in reader:
+            try:
+                yield resale_record(row, source_file)
+            except ValueError as e:
+                print(f"[INGEST] {source_file} line {reader.line_num}: {e}, row skipped")
@@ -1,15 +1,19 @@
 import gradio as gr
 import asyncio
-from autonomous_hdb_deepagents.agent.cli import run_cli
+from autonomous_hdb_deepagents.agent.cli import run_query
 
 # ---------------------------------------------------------
 # ASYNC-SAFE AGENT CALLER
 # ---------------------------------------------------------
-async def query_agent_async(message: str):
+async def query_agent_async(message: str, cursor: str = None):
+    """Reply text and the "load more" page state ({query, cursor} or None)."""
     try:
-        return await run_cli(message)
+        # paged: queries the pipeline understands skip the DeepAgent, so their first answer has a cursor
+        result = await run_query(message, cursor=cursor, paged=True)
     except Exception as e:
-        return f"❌ Error: {e}"
+        return f"❌ Error: {e}", None
+    page = {"query": message, "cursor": result["next_cursor"]} if result["next_cursor"] else None
+    return result["response"], page
 
 
 # ---------------------------------------------------------
@@ -208,6 +212,14 @@ body { background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%); font-famil
     transform: translateY(0);
 }
 
+.more-btn {
+    background: transparent !important;
+    border: 1.5px solid rgba(56, 189, 248, 0.4) !important;
+    color: #38bdf8 !important;
+    border-radius: 8px !important;
+    font-weight: 600 !important;
+}
+
 /* Hide label text for better space */
 #msg-input label { display: none !important; }
 
@@ -224,10 +236,25 @@ async def respond(message, history):
     history = history or []
     history.append({"role": "user", "content": message})
 
-    reply = await query_agent_async(message)
+    reply, page = await query_agent_async(message)
     history.append({"role": "assistant", "content": reply})
 
-    return history, ""
+    return history, "", page, gr.Button(visible=page is not None)
+
+
+# ---------------------------------------------------------
+# LOAD MORE → next page of flats for the last query
+# ---------------------------------------------------------
+async def load_more(history, page):
+    history = history or []
+    if not page:
+        return history, None, gr.Button(visible=False)
+
+    history.append({"role": "user", "content": f"Load more: {page['query']}"})
+    reply, page = await query_agent_async(page["query"], cursor=page["cursor"])
+    history.append({"role": "assistant", "content": reply})
+
+    return history, page, gr.Button(visible=page is not None)
 
 
 # ---------------------------------------------------------
@@ -240,10 +267,10 @@ async def sample_fire(question, history):
     history.append({"role": "user", "content": question})
     
     # Fetch and add response
-    reply = await query_agent_async(question)
+    reply, page = await query_agent_async(question)
     history.append({"role": "assistant", "content": reply})
     
-    return history, ""
+    return history, "", page, gr.Button(visible=page is not None)
 
 
 # ---------------------------------------------------------
@@ -277,6 +304,10 @@ with gr.Blocks(title="HDB DeepAgent Chat", elem_id="main-container") as demo:
     # Chat Area
     with gr.Group(elem_id="chat-container"):
         chat = gr.Chatbot(elem_id="chatbox", height=600)
+        more_btn = gr.Button("Load more", elem_classes="more-btn", visible=False)
+
+    # Query and cursor of the last answer that has more flats
+    page = gr.State(None)
 
     # Input Section
     with gr.Group(elem_id="input-section"):
@@ -290,15 +321,16 @@ with gr.Blocks(title="HDB DeepAgent Chat", elem_id="main-container") as demo:
             submit_btn = gr.Button("Send", elem_classes="submit-btn", scale=0)
 
     # Event Handlers
-    msg.submit(respond, inputs=[msg, chat], outputs=[chat, msg])
-    submit_btn.click(respond, inputs=[msg, chat], outputs=[chat, msg])
+    msg.submit(respond, inputs=[msg, chat], outputs=[chat, msg, page, more_btn])
+    submit_btn.click(respond, inputs=[msg, chat], outputs=[chat, msg, page, more_btn])
+    more_btn.click(load_more, inputs=[chat, page], outputs=[chat, page, more_btn])
 
     # Sample buttons with streaming response
     for btn, question in sample_buttons:
         btn.click(
             sample_fire,
             inputs=[gr.State(question), chat],
-            outputs=[chat, msg],
+            outputs=[chat, msg, page, more_btn],
         )
 
 